@@ -0,0 +1,3 @@
+"""
+热点函数性能基准
+"""
\ No newline at end of file
@@ -0,0 +1,282 @@
+"""
+热点函数微基准
+
+用法:
+    python -m benchmarks.hot_paths --save        # 记录基线到 benchmarks/baseline.json
+    python -m benchmarks.hot_paths               # 与基线比较，超过阈值时退出码为 1
+    python -m benchmarks.hot_paths --threshold 0.5 --only calculate_quantity
+"""
+import io
+import os
+import sys
+import json
+import random
+import timeit
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.client.binance_client import BinanceClient
+from src.client.decoding import backend_name, decode_account, decode_exchange_info
+from src.utils.formatter import format_position_info
+from src.utils.trading import TradingUtils
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_THRESHOLD = 0.25
+SYMBOL_COUNT = 500
+POSITION_COUNT = 500
+
+
+def make_exchange_info(count=SYMBOL_COUNT, seed=1):
+    """生成包含 count 个交易对的 exchangeInfo"""
+    rng = random.Random(seed)
+    symbols = []
+    for i in range(count):
+        tick = rng.choice(['0.1', '0.01', '0.001', '0.0001'])
+        step = rng.choice(['1', '0.1', '0.01', '0.001'])
+        symbols.append({
+            'symbol': f'SYM{i:03d}USDT',
+            'status': 'TRADING',
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'minPrice': tick, 'maxPrice': '1000000', 'tickSize': tick},
+                {'filterType': 'LOT_SIZE', 'minQty': step, 'maxQty': '100000', 'stepSize': step},
+                {'filterType': 'MARKET_LOT_SIZE', 'minQty': step, 'maxQty': '10000', 'stepSize': step},
+                {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+                {'filterType': 'PERCENT_PRICE', 'multiplierUp': '1.05', 'multiplierDown': '0.95',
+                 'multiplierDecimal': '4'}
+            ]
+        })
+    return {'symbols': symbols}
+
+
+def make_account(count=POSITION_COUNT, seed=2):
+    """生成包含 count 个持仓的账户信息"""
+    rng = random.Random(seed)
+    positions = []
+    for i in range(count):
+        entry = rng.uniform(0.1, 50000)
+        amt = rng.choice([-1, 1]) * rng.uniform(0.01, 100)
+        mark = entry * rng.uniform(0.9, 1.1)
+        positions.append({
+            'symbol': f'SYM{i:03d}USDT',
+            'positionAmt': f'{amt:.3f}',
+            'entryPrice': f'{entry:.4f}',
+            'unrealizedProfit': f'{amt * (mark - entry):.8f}',
+            'leverage': str(rng.choice([5, 10, 20, 50]))
+        })
+    return {
+        'totalWalletBalance': '100000.00000000',
+        'totalUnrealizedProfit': '1234.56780000',
+        'positions': positions
+    }
+
+
+def make_exchange_info_payload(count=450, seed=3):
+    """生成接近真实 /fapi/v1/exchangeInfo 响应的 JSON (包含程序不使用的字段和过滤器)"""
+    info = make_exchange_info(count, seed)
+    for s in info['symbols']:
+        s.update({
+            'pair': s['symbol'], 'contractType': 'PERPETUAL', 'deliveryDate': 4133404800000,
+            'onboardDate': 1569398400000, 'maintMarginPercent': '2.5000', 'requiredMarginPercent': '5.0000',
+            'baseAsset': s['symbol'][:-4], 'quoteAsset': 'USDT', 'marginAsset': 'USDT',
+            'pricePrecision': 2, 'quantityPrecision': 3, 'baseAssetPrecision': 8, 'quotePrecision': 8,
+            'underlyingType': 'COIN', 'underlyingSubType': ['PoW'], 'triggerProtect': '0.0500',
+            'liquidationFee': '0.012500', 'marketTakeBound': '0.05', 'maxMoveOrderLimit': 10000,
+            'orderTypes': ['LIMIT', 'MARKET', 'STOP', 'STOP_MARKET', 'TAKE_PROFIT',
+                           'TAKE_PROFIT_MARKET', 'TRAILING_STOP_MARKET'],
+            'timeInForce': ['GTC', 'IOC', 'FOK', 'GTX', 'GTD']
+        })
+        s['filters'][3:3] = [{'filterType': 'MAX_NUM_ORDERS', 'limit': 200},
+                             {'filterType': 'MAX_NUM_ALGO_ORDERS', 'limit': 10}]
+    info.update({'timezone': 'UTC', 'serverTime': 1700000000000, 'futuresType': 'U_MARGINED',
+                 'rateLimits': [], 'exchangeFilters': [], 'assets': []})
+    return json.dumps(info).encode()
+
+
+def make_account_payload(count=450, open_count=20, seed=4):
+    """生成接近真实 /fapi/v2/account 响应的 JSON (全部交易对的持仓，大部分为零)"""
+    account = make_account(open_count, seed)
+    positions = account['positions']
+    for i in range(open_count, count):
+        positions.append({'symbol': f'SYM{i:03d}USDT', 'positionAmt': '0.000', 'entryPrice': '0.0',
+                          'unrealizedProfit': '0.00000000', 'leverage': '20'})
+    for p in positions:
+        p.update({
+            'initialMargin': '0', 'maintMargin': '0', 'positionInitialMargin': '0',
+            'openOrderInitialMargin': '0', 'isolated': False, 'breakEvenPrice': '0.0',
+            'maxNotional': '25000', 'bidNotional': '0', 'askNotional': '0',
+            'positionSide': 'BOTH', 'updateTime': 0
+        })
+    account.update({'feeTier': 0, 'canTrade': True, 'canDeposit': True, 'canWithdraw': True,
+                    'updateTime': 0, 'totalInitialMargin': '0', 'totalMaintMargin': '0',
+                    'totalMarginBalance': '101234.5678', 'availableBalance': '100000', 'assets': []})
+    return json.dumps(account).encode()
+
+
+class FixtureClient:
+    """离线客户端，返回固定的 exchangeInfo、账户和标记价格"""
+
+    testnet = False
+
+    def __init__(self, exchange_info, account):
+        self.exchange_info = exchange_info
+        self.account = account
+        self.prices = {p['symbol']: float(p['entryPrice']) for p in account['positions']}
+
+    def get_exchange_info(self):
+        return self.exchange_info
+
+    def get_futures_account(self):
+        return self.account
+
+    def get_mark_price(self, symbol):
+        return {'symbol': symbol, 'markPrice': str(self.prices.get(symbol, 100.0))}
+
+    def get_all_mark_prices(self):
+        return [{'symbol': s, 'markPrice': str(p)} for s, p in self.prices.items()]
+
+
+def build_benchmarks():
+    """
+    构建基准列表
+    :return: [(名称, 无参数函数, 每次计时的调用次数)]
+    """
+    exchange_info = make_exchange_info()
+    account = make_account()
+    client = FixtureClient(exchange_info, account)
+    trading_utils = TradingUtils(client)
+    trading_utils.price_board = None
+
+    signer = BinanceClient('bench-key', 'bench-secret-' + 'x' * 51)
+    sign_params = {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'LIMIT', 'quantity': 0.01,
+                   'price': 65000.1, 'timeInForce': 'GTC', 'timestamp': 1700000000000}
+
+    # 取靠后的交易对，线性查找时是较差情况
+    symbol = f'SYM{SYMBOL_COUNT - 10:03d}USDT'
+    price = client.prices.get(symbol, 100.0)
+    positions = account['positions']
+
+    def sign():
+        signer._generate_signature(sign_params)
+
+    def filters():
+        trading_utils.get_symbol_filters(symbol)
+
+    def quantity():
+        trading_utils.calculate_quantity(symbol, 12.3456789, price)
+
+    def validate():
+        trading_utils.validate_order(symbol, 'BUY', 1000 / price, price)
+
+    def format_positions():
+        for position in positions:
+            format_position_info(position, float(position['entryPrice']))
+
+    def display():
+        with contextlib.redirect_stdout(io.StringIO()):
+            trading_utils.display_account_info()
+
+    # 选择性解码与标准库完整解码对照，json.loads 行只作为参照
+    exchange_info_payload = make_exchange_info_payload()
+    account_payload = make_account_payload()
+
+    return [
+        ('_generate_signature', sign, 2000),
+        ('get_symbol_filters', filters, 500),
+        ('calculate_quantity', quantity, 500),
+        ('validate_order', validate, 200),
+        ('format_position_info[500]', format_positions, 5),
+        ('display_account_info[500]', display, 1),
+        (f'decode_exchange_info[{backend_name()}]', lambda: decode_exchange_info(exchange_info_payload), 10),
+        ('json.loads[exchangeInfo]', lambda: json.loads(exchange_info_payload), 10),
+        (f'decode_account[{backend_name()}]', lambda: decode_account(account_payload), 50),
+        ('json.loads[account]', lambda: json.loads(account_payload), 50),
+    ]
+
+
+def decode_comparisons():
+    """
+    选择性解码必须快于标准库完整解码的基准对 (未安装 msgspec / orjson 时不检查)
+    :return: [(解码基准名称, 参照基准名称)]
+    """
+    if backend_name() == 'json':
+        return []
+    return [
+        (f'decode_exchange_info[{backend_name()}]', 'json.loads[exchangeInfo]'),
+        (f'decode_account[{backend_name()}]', 'json.loads[account]'),
+    ]
+
+
+def measure(func, number, repeat=5):
+    """返回单次调用的最短耗时 (秒)"""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def format_seconds(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.2f} us"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='热点函数微基准')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件')
+    parser.add_argument('--save', action='store_true', help='将本次结果保存为基线')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='允许的性能退化比例 (默认 0.25 即 25%%)')
+    parser.add_argument('--only', nargs='*', help='只运行指定名称的基准')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数 (取最小值)')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    missing = []
+    print(f"{'基准':<30}{'耗时':>14}{'基线':>14}{'变化':>10}")
+    for name, func, number in build_benchmarks():
+        if args.only and name not in args.only:
+            continue
+        seconds = measure(func, number, args.repeat)
+        results[name] = seconds
+        base = baseline.get(name)
+        if base:
+            change = seconds / base - 1
+            mark = ''
+            if change > args.threshold:
+                regressions.append(name)
+                mark = ' !'
+            print(f"{name:<32}{format_seconds(seconds):>14}{format_seconds(base):>14}{change:>+9.1%}{mark}")
+        else:
+            missing.append(name)
+            print(f"{name:<32}{format_seconds(seconds):>14}{'-':>14}{'-':>10}")
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\n基线已保存到 {args.baseline}")
+        return 0
+
+    status = 0
+    if missing:
+        # 没有基线时无法判断是否退化，门禁不能视为通过
+        print(f"\n缺少基线: {', '.join(missing)}，请先运行 --save 记录基线", file=sys.stderr)
+        status = 1
+    if regressions:
+        print(f"\n性能退化超过 {args.threshold:.0%}: {', '.join(regressions)}")
+        status = 1
+    for name, reference in decode_comparisons():
+        if name in results and reference in results and results[name] >= results[reference]:
+            print(f"\n{name} ({format_seconds(results[name])}) 没有快于 {reference} "
+                  f"({format_seconds(results[reference])})")
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
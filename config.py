@@ -51,14 +51,16 @@ def get_env_from_args():
     args = parser.parse_args()
     return args.env
 
-try:
-    # 从命令行参数获取环境设置
-    ENV = get_env_from_args()
-    # 加载API配置
-    API_KEY, API_SECRET, IS_TESTNET = load_api_config(ENV)
-except Exception as e:
-    print(f"错误: {str(e)}")
-    sys.exit(1)
+if __name__ == "__main__":
+    # 直接运行本文件时检查配置；作为模块导入时不解析命令行，避免与 main.py 的参数冲突
+    try:
+        # 从命令行参数获取环境设置
+        ENV = get_env_from_args()
+        # 加载API配置
+        API_KEY, API_SECRET, IS_TESTNET = load_api_config(ENV)
+    except Exception as e:
+        print(f"错误: {str(e)}")
+        sys.exit(1)
 
-if not API_KEY or not API_SECRET:
-    raise ValueError("Please make sure you have set up your API keys in api_config.json") 
\ No newline at end of file
+    if not API_KEY or not API_SECRET:
+        raise ValueError("Please make sure you have set up your API keys in api_config.json")
@@ -2,8 +2,9 @@ import sys
 import argparse
 import questionary
 from config import load_api_config
+from src.client.transport import create_transport
 from src.mainnet_trade import run_mainnet
-from src.testnet_trade import run_testnet
+from src.testnet_trade import run_testnet, run_paper
 
 def create_parser():
     """创建命令行参数解析器"""
@@ -27,11 +28,58 @@ def create_parser():
   # 修改杠杆倍数（测试网）
   python main.py leverage BTCUSDT 20
   
+  # 价格告警（主网标记价格）
+  python main.py alert add BTCUSDT price above 70000
+  python main.py alert add ETHUSDT percent below 5 --recurring --hook file:alerts.log
+  python main.py alert add BTCUSDT roi above 50 --hook "cmd:notify-send 止盈"
+  python main.py alert watch
+  
+  # 启动行情进程，向本机其它进程共享标记价格
+  python main.py board --interval 1
+  
+  # 同步成交和资金流水到本地数据库，离线查看盈亏报表
+  python main.py sync
+  python main.py pnl --by symbol
+  python main.py pnl --by day --days 30
+  
+  # 拆单执行（测试网）：10分钟内分10笔买入，冰山限价卖出
+  python main.py exec BTCUSDT BUY 5 --strategy twap --duration 600 --slices 10
+  python main.py exec BTCUSDT SELL 5 --strategy iceberg --price 70000 --display 0.5
+  python main.py exec ETHUSDT BUY 50 --strategy pov --rate 0.05 --interval 60 --dry-run
+  
+  # 按目标权重调仓（先预览，确认后执行）
+  python main.py rebalance targets.json --gross 1.0
+  python main.py rebalance targets.json --close-others --execute
+  
+  # K线指标：持仓指标、全市场扫描（可订阅实时数据流）
+  python main.py status --indicators 1h
+  python main.py scan --interval 15m --top 20
+  python main.py scan BTCUSDT ETHUSDT --interval 1m --stream 60 --source aggTrade
+  
+  # 持仓排序、分页，或输出 NDJSON / CSV 供其它工具处理
+  python main.py status --sort unrealized_profit --desc --top 20
+  python main.py status --page-size 50 --page 2
+  python main.py status --format ndjson | jq .
+  python main.py scan --top 0 --format csv > scan.csv
+  
+  # 模拟交易（本地撮合，不需要API密钥）
+  python main.py paper --balance 10000
+  
+  # 录制真实请求，之后离线回放（可加速）
+  python main.py --record session.jsonl.gz status
+  python main.py --replay session.jsonl.gz --replay-speed 10 status
+  
   # 启动交互式菜单
   python main.py
 """
     )
     
+    # 传输层选项 - 录制与回放
+    parser.add_argument('--record', metavar='FILE', help='录制所有请求和响应到文件')
+    parser.add_argument('--replay', metavar='FILE', help='从录制文件离线回放，不访问网络')
+    parser.add_argument('--replay-speed', type=float, default=0,
+                        help='回放速度倍数 (1 为原始耗时，0 为不等待)')
+    
     # 创建子命令解析器
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
@@ -48,6 +96,17 @@ def create_parser():
     status_parser = subparsers.add_parser('status', help='查看账户状态')
     status_parser.add_argument('--env', choices=['main', 'test'], 
                              default='main', help='选择环境 (main 或 test)')
+    status_parser.add_argument('--indicators', nargs='?', const='15m', metavar='INTERVAL',
+                             help='显示持仓交易对的K线指标 (默认周期 15m，仅主网)')
+    status_parser.add_argument('--format', choices=['table', 'ndjson', 'csv'], default='table',
+                             help='输出格式，ndjson / csv 只输出持仓数据 (仅主网)')
+    status_parser.add_argument('--sort', choices=['symbol', 'quantity', 'entry_price', 'mark_price',
+                                                  'leverage', 'unrealized_profit', 'roi', 'position_amt'],
+                             help='持仓排序字段 (position_amt 仅用于 ndjson / csv)')
+    status_parser.add_argument('--desc', action='store_true', help='降序排序')
+    status_parser.add_argument('--top', type=int, help='只显示前 N 个持仓')
+    status_parser.add_argument('--page-size', type=int, help='每页行数')
+    status_parser.add_argument('--page', type=int, default=1, help='页码')
     
     # leverage 命令 - 修改杠杆倍数
     leverage_parser = subparsers.add_parser('leverage', help='修改杠杆倍数')
@@ -56,22 +115,310 @@ def create_parser():
     leverage_parser.add_argument('--env', choices=['main', 'test'], 
                                default='test', help='选择环境 (main 或 test)')
     
+    # alert 命令 - 价格与盈亏告警
+    alert_parser = subparsers.add_parser('alert', help='价格与盈亏告警')
+    alert_parser.add_argument('--env', choices=['main', 'test'],
+                              default='main', help='选择环境 (main 或 test)')
+    alert_parser.add_argument('--file', default='alerts.json', help='告警保存文件')
+    alert_subparsers = alert_parser.add_subparsers(dest='alert_action', required=True)
+    
+    alert_add_parser = alert_subparsers.add_parser('add', help='添加告警')
+    alert_add_parser.add_argument('symbol', help='交易对，例如 BTCUSDT')
+    alert_add_parser.add_argument('kind', choices=['price', 'percent', 'roi'],
+                                  help='告警类型 (价格 / 涨跌幅 / 持仓收益率)')
+    alert_add_parser.add_argument('direction', choices=['above', 'below'], help='方向')
+    alert_add_parser.add_argument('value', type=float, help='阈值 (价格或百分比)')
+    alert_add_parser.add_argument('--recurring', action='store_true', help='重复触发')
+    alert_add_parser.add_argument('--hook', action='append', dest='hooks',
+                                  help='触发钩子: stdout, file:路径, cmd:命令 (可重复)')
+    
+    alert_subparsers.add_parser('list', help='列出告警')
+    
+    alert_remove_parser = alert_subparsers.add_parser('remove', help='删除告警')
+    alert_remove_parser.add_argument('alert_id', type=int, help='告警编号')
+    
+    alert_watch_parser = alert_subparsers.add_parser('watch', help='持续监控告警')
+    alert_watch_parser.add_argument('--interval', type=float, default=5, help='轮询间隔 (秒)')
+    
+    # sync 命令 - 同步成交和资金流水
+    sync_parser = subparsers.add_parser('sync', help='同步成交和资金流水到本地数据库')
+    sync_parser.add_argument('--env', choices=['main', 'test'],
+                             default='main', help='选择环境 (main 或 test)')
+    sync_parser.add_argument('--db', default='history.db', help='本地数据库文件')
+    sync_parser.add_argument('--days', type=int, default=90, help='首次同步回溯天数')
+    sync_parser.add_argument('--workers', type=int, default=4, help='并发线程数')
+    sync_parser.add_argument('--symbols', nargs='*', default=[], help='额外同步的交易对')
+    
+    # pnl 命令 - 盈亏报表
+    pnl_parser = subparsers.add_parser('pnl', help='查看本地盈亏报表 (不访问接口)')
+    pnl_parser.add_argument('--db', default='history.db', help='本地数据库文件')
+    pnl_parser.add_argument('--by', choices=['symbol', 'day'], default='symbol', help='汇总方式')
+    pnl_parser.add_argument('--days', type=int, help='只统计最近 N 天')
+    
+    # exec 命令 - 拆单执行
+    exec_parser = subparsers.add_parser('exec', help='拆单执行 (TWAP / 成交量比例 / 冰山)')
+    exec_parser.add_argument('symbol', help='交易对，例如 BTCUSDT')
+    exec_parser.add_argument('side', choices=['BUY', 'SELL'], type=str.upper, help='方向')
+    exec_parser.add_argument('quantity', type=float, help='总数量')
+    exec_parser.add_argument('--strategy', choices=['twap', 'pov', 'iceberg'], default='twap', help='执行策略')
+    exec_parser.add_argument('--duration', type=float, default=600, help='TWAP 总时长 (秒)')
+    exec_parser.add_argument('--slices', type=int, default=10, help='TWAP 子单数量')
+    exec_parser.add_argument('--rate', type=float, default=0.1, help='成交量参与率 (0-1)')
+    exec_parser.add_argument('--interval', type=float, default=60, help='成交量策略下单间隔 / 冰山查询间隔 (秒)')
+    exec_parser.add_argument('--price', type=float, help='冰山订单限价')
+    exec_parser.add_argument('--display', type=float, help='冰山订单每次显示数量')
+    exec_parser.add_argument('--max-duration', type=float, default=3600, help='最长执行时间 (秒)')
+    exec_parser.add_argument('--dry-run', action='store_true', help='只显示拆单计划，不下单')
+    exec_parser.add_argument('--env', choices=['main', 'test'],
+                             default='test', help='选择环境 (main 或 test)')
+    
+    # rebalance 命令 - 组合调仓
+    rebalance_parser = subparsers.add_parser('rebalance', help='按目标权重或名义价值调仓')
+    rebalance_parser.add_argument('targets', help='目标仓位 JSON 文件')
+    rebalance_parser.add_argument('--gross', type=float, default=1.0, help='权重对应的总敞口倍数 (相对账户权益)')
+    rebalance_parser.add_argument('--close-others', action='store_true', help='平掉不在目标中的持仓')
+    rebalance_parser.add_argument('--execute', action='store_true', help='预览后确认并提交订单')
+    rebalance_parser.add_argument('--env', choices=['main', 'test'],
+                                  default='test', help='选择环境 (main 或 test)')
+    
+    # paper 命令 - 模拟交易
+    paper_parser = subparsers.add_parser('paper', help='模拟交易（本地撮合）')
+    paper_parser.add_argument('--balance', type=float, default=10000.0, help='初始 USDT 余额')
+    
+    # scan 命令 - K线指标扫描
+    scan_parser = subparsers.add_parser('scan', help='扫描交易对的K线指标 (EMA / ATR / VWAP / 波动率)')
+    scan_parser.add_argument('symbols', nargs='*', help='交易对，默认扫描全部 USDT 永续合约')
+    scan_parser.add_argument('--interval', default='15m', help='K线周期 (默认 15m)')
+    scan_parser.add_argument('--limit', type=int, default=200, help='初始化使用的历史K线数量')
+    scan_parser.add_argument('--stream', type=float, default=0, help='订阅实时数据流的秒数 (需要 websockets)')
+    scan_parser.add_argument('--source', choices=['kline', 'aggTrade'], default='kline', help='实时数据流类型')
+    scan_parser.add_argument('--sort', choices=['volatility', 'atr_pct', 'symbol'], default='volatility',
+                             help='排序字段')
+    scan_parser.add_argument('--top', type=int, default=30, help='只显示前 N 个交易对 (0 为全部)')
+    scan_parser.add_argument('--format', choices=['table', 'ndjson', 'csv'], default='table', help='输出格式')
+    scan_parser.add_argument('--workers', type=int, default=8, help='初始化并发线程数')
+    scan_parser.add_argument('--env', choices=['main', 'test'],
+                             default='main', help='选择环境 (main 或 test)')
+    
+    # board 命令 - 共享内存价格板行情进程
+    board_parser = subparsers.add_parser('board', help='启动共享内存价格板行情进程')
+    board_parser.add_argument('--env', choices=['main', 'test'],
+                              default='main', help='选择环境 (main 或 test)')
+    board_parser.add_argument('--interval', type=float, default=1.0, help='刷新间隔 (秒)')
+    board_parser.add_argument('--capacity', type=int, default=1024, help='最多容纳的交易对数量')
+    
     return parser
 
-def handle_leverage_command(args, api_key, api_secret):
+def handle_leverage_command(args, api_key, api_secret, transport=None):
     """处理修改杠杆的命令"""
     from src.client.binance_client import BinanceClient
     
     try:
-        client = BinanceClient(api_key, api_secret, testnet=(args.env == 'test'))
+        client = BinanceClient(api_key, api_secret, testnet=(args.env == 'test'), transport=transport)
         result = client.change_leverage(args.symbol.upper(), args.leverage)
         print(f"\n杠杆修改成功: {result['leverage']}x")
     except Exception as e:
         print(f"修改杠杆失败: {str(e)}")
         sys.exit(1)
 
+def handle_alert_command(args, api_key, api_secret, transport=None):
+    """处理告警命令"""
+    from src.client.binance_client import BinanceClient
+    from src.utils.alerts import AlertEngine, format_alert, watch_alerts
+    
+    client = BinanceClient(api_key, api_secret, testnet=(args.env == 'test'), transport=transport)
+    engine = AlertEngine(args.file).load()
+    
+    if args.alert_action == 'add':
+        symbol = args.symbol.upper()
+        reference_price = float(client.get_mark_price(symbol)['markPrice'])
+        position = None
+        if args.kind == 'roi':
+            positions = client.get_futures_account()['positions']
+            position = next((p for p in positions if p['symbol'] == symbol), None)
+        alert = engine.add_alert(symbol, args.kind, args.direction, args.value,
+                                 recurring=args.recurring, hooks=args.hooks,
+                                 reference_price=reference_price, position=position)
+        engine.save()
+        print(f"已添加告警: {format_alert(alert)}")
+        if alert['level'] is None:
+            print("当前没有该交易对的持仓，告警将在开仓后生效")
+    elif args.alert_action == 'list':
+        if not engine.alerts:
+            print("当前没有告警")
+        for alert in engine.alerts.values():
+            mode = '重复' if alert['recurring'] else '单次'
+            print(f"{format_alert(alert)} [{mode}] 触发价位: {alert['level']}")
+    elif args.alert_action == 'remove':
+        alert = engine.remove_alert(args.alert_id)
+        engine.save()
+        print(f"已删除告警: {format_alert(alert)}")
+    else:
+        watch_alerts(client, engine, interval=args.interval)
+
+def handle_sync_command(args, api_key, api_secret, transport=None):
+    """处理同步历史记录的命令"""
+    from src.client.binance_client import BinanceClient
+    from src.utils.history import HistoryStore, HistorySync
+    
+    client = BinanceClient(api_key, api_secret, testnet=(args.env == 'test'), transport=transport)
+    store = HistoryStore(args.db)
+    try:
+        HistorySync(client, store, days=args.days, workers=args.workers).run([s.upper() for s in args.symbols])
+    finally:
+        store.close()
+
+def handle_exec_command(args, api_key, api_secret, transport=None):
+    """处理拆单执行的命令"""
+    from src.client.binance_client import BinanceClient
+    from src.utils.trading import TradingUtils
+    from src.utils.execution import ExecutionScheduler, ParentOrder, run_parent_orders
+    
+    client = BinanceClient(api_key, api_secret, testnet=(args.env == 'test'), transport=transport)
+    trading_utils = TradingUtils(client)
+    parent = ParentOrder(
+        args.symbol.upper(), args.side, args.quantity, strategy=args.strategy,
+        duration=args.duration, slices=args.slices, rate=args.rate, interval=args.interval,
+        price=args.price, display_qty=args.display, max_duration=args.max_duration
+    )
+    ExecutionScheduler(client, trading_utils).prepare(parent)
+    
+    print(f"\n=== 拆单计划 ({args.strategy.upper()}) ===")
+    print(f"交易对: {parent.symbol}  方向: {parent.side}  总数量: {parent.quantity}")
+    if args.strategy == 'pov':
+        print(f"参与率: {args.rate}  间隔: {args.interval} 秒  单笔数量规则: {parent.rules}")
+    else:
+        print(f"子单数量: {len(parent.plan)}  单笔: {parent.plan[0]} ~ {parent.plan[-1]}")
+    if parent.remainder:
+        print(f"零头 {parent.remainder} 小于下单步长，不会执行")
+    
+    if args.dry_run:
+        return
+    confirm = input("\n确认执行? (y/n): ").strip().lower()
+    if confirm != 'y':
+        print("已取消")
+        return
+    run_parent_orders(client, trading_utils, [parent])
+
+def handle_rebalance_command(args, api_key, api_secret, transport=None):
+    """处理组合调仓的命令"""
+    from src.client.binance_client import BinanceClient
+    from src.utils.trading import TradingUtils
+    from src.utils.rebalance import BasketRebalancer, load_targets, format_rebalance_plan
+    
+    client = BinanceClient(api_key, api_secret, testnet=(args.env == 'test'), transport=transport)
+    trading_utils = TradingUtils(client)
+    rebalancer = BasketRebalancer(client, trading_utils)
+    legs = rebalancer.plan(load_targets(args.targets), gross=args.gross, close_others=args.close_others)
+    
+    print("\n=== 调仓预览 ===")
+    print(format_rebalance_plan(legs))
+    if not args.execute:
+        return
+    confirm = input("\n确认提交以上订单? (y/n): ").strip().lower()
+    if confirm != 'y':
+        print("已取消")
+        return
+    for symbol, quantity, status, error in rebalancer.execute(legs):
+        print(f"{symbol} {quantity}: {status}" + (f" ({error})" if error else ""))
+
+def handle_scan_command(args, api_key, api_secret, transport=None):
+    """处理K线指标扫描命令"""
+    from src.client.binance_client import BinanceClient
+    from src.utils.candles import CandleEngine, INTERVAL_MS, INDICATOR_COLUMNS, stream_candles
+    from src.utils.table import render_table
+    
+    if args.interval not in INTERVAL_MS:
+        raise ValueError(f"不支持的K线周期: {args.interval}，可选: {', '.join(INTERVAL_MS)}")
+    
+    client = BinanceClient(api_key, api_secret, testnet=(args.env == 'test'), transport=transport)
+    symbols = [s.upper() for s in args.symbols]
+    if not symbols:
+        symbols = [
+            s['symbol'] for s in client.get_exchange_info()['symbols']
+            if s.get('status') == 'TRADING' and s['symbol'].endswith('USDT')
+        ]
+    
+    # 机器可读格式时进度信息输出到 stderr，不混入数据
+    log = sys.stdout if args.format == 'table' else sys.stderr
+    engine = CandleEngine()
+    print(f"正在加载 {len(symbols)} 个交易对的 {args.interval} K线...", file=log)
+    failed = engine.seed(client, symbols, args.interval, limit=args.limit, workers=args.workers)
+    if failed:
+        print(f"{len(failed)} 个交易对获取K线失败，已跳过: {', '.join(sorted(failed))}", file=log)
+        symbols = [s for s in symbols if s not in failed]
+    if args.stream > 0:
+        print(f"订阅 {args.source} 数据流 {args.stream:g} 秒...", file=log)
+        stream_candles(engine, symbols, args.interval, args.stream, source=args.source, testnet=client.testnet)
+    
+    if args.format == 'table':
+        print(f"\n=== K线指标扫描 ({args.interval}，按 {args.sort} 排序) ===")
+    render_table(INDICATOR_COLUMNS, engine.snapshots(args.interval), args.format,
+                 sort=args.sort, reverse=(args.sort != 'symbol'), top=args.top or None)
+
+def handle_pnl_command(args):
+    """处理盈亏报表命令"""
+    import os
+    import time
+    from tabulate import tabulate
+    from src.utils.formatter import format_number
+    from src.utils.history import HistoryStore
+    
+    if not os.path.exists(args.db):
+        raise ValueError(f"数据库 {args.db} 不存在，请先运行 python main.py sync")
+    
+    store = HistoryStore(args.db)
+    try:
+        start_time = int((time.time() - args.days * 86400) * 1000) if args.days else None
+        if args.by == 'symbol':
+            rows = [
+                [symbol, format_number(pnl), format_number(fee), format_number(funding),
+                 format_number(net), count, format_number(volume or 0)]
+                for symbol, pnl, fee, funding, net, count, volume in store.pnl_by_symbol(start_time)
+            ]
+            headers = ["交易对", "已实现盈亏", "手续费", "资金费", "净盈亏", "成交笔数", "成交额"]
+        else:
+            rows = [
+                [day, format_number(pnl), format_number(fee), format_number(funding), format_number(net)]
+                for day, pnl, fee, funding, net in store.pnl_by_day(start_time)
+            ]
+            headers = ["日期", "已实现盈亏", "手续费", "资金费", "净盈亏"]
+    finally:
+        store.close()
+    
+    if rows:
+        print(tabulate(rows, headers=headers, tablefmt="grid", disable_numparse=True))
+    else:
+        print("没有盈亏记录")
+
+def warm_sessions():
+    """
+    在后台为已配置的环境创建 TradingUtils 并开始预取，
+    用户阅读菜单时账户信息、交易规则和标记价格已经在加载
+    :return: {环境: TradingUtils}，加载完成后才会出现在字典中
+    """
+    import threading
+    from src.client.binance_client import BinanceClient
+    from src.utils.trading import TradingUtils
+    
+    sessions = {}
+    
+    def build(env):
+        try:
+            api_key, api_secret, _ = load_api_config(env)
+            client = BinanceClient(api_key, api_secret, testnet=(env == 'testnet'))
+            sessions[env] = TradingUtils(client, prefetch=True)
+        except Exception:
+            # 未配置的环境在用户选择时再报错
+            pass
+    
+    for env in ('mainnet', 'testnet'):
+        threading.Thread(target=build, args=(env,), daemon=True).start()
+    return sessions
+
 def interactive_menu():
     """交互式菜单"""
+    sessions = warm_sessions()
     while True:
         # 主菜单选项
         action = questionary.select(
@@ -132,6 +479,8 @@ def interactive_menu():
                     
                     api_key, api_secret, _ = load_api_config(api_env)
                     handle_leverage_command(args, api_key, api_secret)
+                    if api_env in sessions:
+                        sessions[api_env].invalidate_account()
                     
                 except ValueError:
                     print("杠杆倍数必须是整数")
@@ -142,9 +491,9 @@ def interactive_menu():
                 api_key, api_secret, is_testnet = load_api_config(api_env)
                 
                 if action == "test" or (action == "status" and env_choice == "test"):
-                    run_testnet(api_key, api_secret)
+                    run_testnet(api_key, api_secret, trading_utils=sessions.get('testnet'))
                 elif action == "main" or (action == "status" and env_choice == "main"):
-                    run_mainnet(api_key, api_secret)
+                    run_mainnet(api_key, api_secret, trading_utils=sessions.get('mainnet'))
                         
         except Exception as e:
             print(f"错误: {str(e)}")
@@ -167,6 +516,10 @@ def main():
     parser = create_parser()
     args = parser.parse_args()
     
+    # ndjson / csv 输出只能包含一种记录，持仓和指标不能混在同一个输出流中
+    if args.command == 'status' and args.indicators and args.format != 'table':
+        parser.error("--indicators 只支持 table 格式，指标数据请使用 scan --format")
+    
     # 如果没有提供命令，启动交互式菜单
     if not args.command:
         try:
@@ -176,31 +529,85 @@ def main():
             print("\n程序已退出")
             sys.exit(0)
     
+    # 盈亏报表只读取本地数据库
+    if args.command == 'pnl':
+        try:
+            handle_pnl_command(args)
+        except Exception as e:
+            print(f"错误: {str(e)}")
+            sys.exit(1)
+        return
+    
+    # 模拟交易只使用公开行情，不需要加载API配置
+    if args.command == 'paper':
+        transport = create_transport(args.record, args.replay, args.replay_speed)
+        try:
+            run_paper(args.balance, transport)
+        finally:
+            if transport is not None:
+                transport.close()
+        return
+    
     try:
         # 根据命令选择环境
         env = {
             'test': 'testnet',
             'main': 'mainnet',
             'trade': 'testnet',
-            'status': 'mainnet' if args.env == 'main' else 'testnet',
-            'leverage': 'mainnet' if args.env == 'main' else 'testnet'
+            'status': 'mainnet' if getattr(args, 'env', None) == 'main' else 'testnet',
+            'leverage': 'mainnet' if getattr(args, 'env', None) == 'main' else 'testnet',
+            'alert': 'mainnet' if getattr(args, 'env', None) == 'main' else 'testnet',
+            'board': 'mainnet' if getattr(args, 'env', None) == 'main' else 'testnet',
+            'sync': 'mainnet' if getattr(args, 'env', None) == 'main' else 'testnet',
+            'exec': 'mainnet' if getattr(args, 'env', None) == 'main' else 'testnet',
+            'rebalance': 'mainnet' if getattr(args, 'env', None) == 'main' else 'testnet',
+            'scan': 'mainnet' if getattr(args, 'env', None) == 'main' else 'testnet'
         }[args.command]
         
-        # 加载API配置
-        api_key, api_secret = load_api_config(env)
+        # 加载API配置，离线回放时允许没有配置文件
+        try:
+            api_key, api_secret, _ = load_api_config(env)
+        except (FileNotFoundError, ValueError):
+            if not args.replay:
+                raise
+            api_key, api_secret = 'replay', 'replay'
+        
+        transport = create_transport(args.record, args.replay, args.replay_speed)
         
         # 处理不同的命令
-        if args.command == 'leverage':
-            handle_leverage_command(args, api_key, api_secret)
-        elif args.command in ['test', 'trade']:
-            run_testnet(api_key, api_secret)
-        elif args.command == 'status':
-            if args.env == 'main':
-                run_mainnet(api_key, api_secret)
-            else:
-                run_testnet(api_key, api_secret)
-        else:  # main
-            run_mainnet(api_key, api_secret)
+        try:
+            if args.command == 'leverage':
+                handle_leverage_command(args, api_key, api_secret, transport)
+            elif args.command == 'alert':
+                handle_alert_command(args, api_key, api_secret, transport)
+            elif args.command == 'rebalance':
+                handle_rebalance_command(args, api_key, api_secret, transport)
+            elif args.command == 'exec':
+                handle_exec_command(args, api_key, api_secret, transport)
+            elif args.command == 'sync':
+                handle_sync_command(args, api_key, api_secret, transport)
+            elif args.command == 'scan':
+                handle_scan_command(args, api_key, api_secret, transport)
+            elif args.command == 'board':
+                from src.client.binance_client import BinanceClient
+                from src.utils.price_board import run_price_board
+                client = BinanceClient(api_key, api_secret, testnet=(args.env == 'test'), transport=transport)
+                run_price_board(client, interval=args.interval, capacity=args.capacity)
+            elif args.command in ['test', 'trade']:
+                run_testnet(api_key, api_secret, transport)
+            elif args.command == 'status':
+                if args.env == 'main':
+                    run_mainnet(api_key, api_secret, transport, indicators=args.indicators, display_options={
+                        'fmt': args.format, 'sort': args.sort, 'reverse': args.desc,
+                        'top': args.top, 'page_size': args.page_size, 'page': args.page
+                    })
+                else:
+                    run_testnet(api_key, api_secret, transport)
+            else:  # main
+                run_mainnet(api_key, api_secret, transport)
+        finally:
+            if transport is not None:
+                transport.close()
             
     except Exception as e:
         print(f"错误: {str(e)}")
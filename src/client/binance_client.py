@@ -1,15 +1,22 @@
-import requests
 import time
 import hmac
 import hashlib
 from urllib.parse import urlencode
+from src.client.transport import HttpTransport, TransportError
+from src.client.decoding import loads, decode_account, decode_exchange_info
 
 class BinanceClient:
-    def __init__(self, api_key, api_secret, testnet=False):
+    def __init__(self, api_key, api_secret, testnet=False, transport=None):
+        """
+        :param transport: 传输层 (HttpTransport / RecordingTransport / ReplayTransport)，默认实时 HTTP
+        """
         self.API_KEY = api_key
         self.API_SECRET = api_secret
         self.BASE_URL = 'https://testnet.binancefuture.com' if testnet else 'https://fapi.binance.com'
         self.testnet = testnet
+        self.transport = transport or HttpTransport()
+        # 最近一次响应头中报告的已用权重 (1分钟窗口)
+        self.used_weight = None
 
     def _get_timestamp(self):
         return int(time.time() * 1000)
@@ -26,7 +33,10 @@ class BinanceClient:
         except Exception as e:
             raise ValueError(f"签名生成失败: {str(e)}, 请检查API密钥格式是否正确")
 
-    def _send_request(self, method, endpoint, params=None, signed=True):
+    def _send_request(self, method, endpoint, params=None, signed=True, decoder=None):
+        """
+        :param decoder: 响应体解码函数，默认完整解码
+        """
         url = f"{self.BASE_URL}{endpoint}"
         headers = {'X-MBX-APIKEY': self.API_KEY}
         
@@ -38,27 +48,34 @@ class BinanceClient:
             params['signature'] = self._generate_signature(params)
         
         try:
-            response = requests.request(method, url, headers=headers, params=params)
+            response = self.transport.request(method, url, headers=headers, params=params)
+            self._update_used_weight(response.headers)
             
             # 检查响应状态码
             if response.status_code != 200:
                 error_msg = response.json().get('msg', '未知错误')
                 raise ValueError(f"API请求失败 (状态码: {response.status_code}): {error_msg}")
                 
-            return response.json()
+            return (decoder or loads)(response.content)
             
-        except requests.exceptions.RequestException as e:
+        except TransportError as e:
             raise ValueError(f"网络请求失败: {str(e)}")
 
+    def _update_used_weight(self, headers):
+        for key, value in (headers or {}).items():
+            if key.lower() == 'x-mbx-used-weight-1m':
+                self.used_weight = int(value)
+                return
+
     def get_exchange_info(self):
-        """获取交易规则"""
+        """获取交易规则 (只解码交易对状态和用到的过滤器)"""
         endpoint = '/fapi/v1/exchangeInfo'
-        return self._send_request('GET', endpoint, signed=False)
+        return self._send_request('GET', endpoint, signed=False, decoder=decode_exchange_info)
 
     def get_futures_account(self):
-        """获取账户信息"""
+        """获取账户信息 (只解码账户总览和非零持仓)"""
         endpoint = '/fapi/v2/account'
-        return self._send_request('GET', endpoint)
+        return self._send_request('GET', endpoint, decoder=decode_account)
 
     def get_mark_price(self, symbol):
         """获取标记价格"""
@@ -66,7 +83,12 @@ class BinanceClient:
         params = {'symbol': symbol}
         return self._send_request('GET', endpoint, params, signed=False)
 
-    def place_order(self, symbol, side, order_type, quantity, price=None, reduce_only=False):
+    def get_all_mark_prices(self):
+        """获取全部交易对的标记价格"""
+        endpoint = '/fapi/v1/premiumIndex'
+        return self._send_request('GET', endpoint, signed=False)
+
+    def place_order(self, symbol, side, order_type, quantity, price=None, reduce_only=False, resp_type=None):
         """
         下单函数
         :param symbol: 交易对
@@ -75,6 +97,7 @@ class BinanceClient:
         :param quantity: 数量
         :param price: 价格 (限价单必需)
         :param reduce_only: 是否只减仓
+        :param resp_type: 返回类型 ("ACK" 或 "RESULT")，RESULT 会返回成交数量和均价
         """
         endpoint = '/fapi/v1/order'
         params = {
@@ -91,8 +114,38 @@ class BinanceClient:
             params['price'] = price
             params['timeInForce'] = 'GTC'  # 有效直到取消
 
+        if resp_type:
+            params['newOrderRespType'] = resp_type
+
         return self._send_request('POST', endpoint, params)
 
+    def get_order(self, symbol, order_id):
+        """查询订单"""
+        endpoint = '/fapi/v1/order'
+        params = {'symbol': symbol, 'orderId': order_id}
+        return self._send_request('GET', endpoint, params)
+
+    def cancel_order(self, symbol, order_id):
+        """撤销订单"""
+        endpoint = '/fapi/v1/order'
+        params = {'symbol': symbol, 'orderId': order_id}
+        return self._send_request('DELETE', endpoint, params)
+
+    def get_klines(self, symbol, interval='1m', limit=500, start_time=None, end_time=None):
+        """
+        获取K线
+        :param symbol: 交易对
+        :param interval: K线周期，例如 1m / 5m / 1h
+        :param limit: 数量 (最大1500)
+        """
+        endpoint = '/fapi/v1/klines'
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+        if start_time is not None:
+            params['startTime'] = start_time
+        if end_time is not None:
+            params['endTime'] = end_time
+        return self._send_request('GET', endpoint, params, signed=False)
+
     def change_leverage(self, symbol, leverage):
         """
         修改杠杆倍数
@@ -104,4 +157,44 @@ class BinanceClient:
             'symbol': symbol,
             'leverage': leverage
         }
-        return self._send_request('POST', endpoint, params) 
\ No newline at end of file
+        return self._send_request('POST', endpoint, params) 
+
+    def get_user_trades(self, symbol, from_id=None, start_time=None, end_time=None, limit=1000):
+        """
+        获取账户成交历史
+        :param symbol: 交易对
+        :param from_id: 从该成交ID开始返回 (包含)
+        :param start_time: 起始时间 (毫秒)
+        :param end_time: 结束时间 (毫秒)，与 start_time 间隔不能超过7天
+        :param limit: 每页数量 (最大1000)
+        """
+        endpoint = '/fapi/v1/userTrades'
+        params = {'symbol': symbol, 'limit': limit}
+        if from_id is not None:
+            params['fromId'] = from_id
+        if start_time is not None:
+            params['startTime'] = start_time
+        if end_time is not None:
+            params['endTime'] = end_time
+        return self._send_request('GET', endpoint, params)
+
+    def get_income(self, start_time=None, end_time=None, income_type=None, symbol=None, limit=1000):
+        """
+        获取资金流水 (已实现盈亏、手续费、资金费等)
+        :param start_time: 起始时间 (毫秒)
+        :param end_time: 结束时间 (毫秒)
+        :param income_type: 流水类型，例如 REALIZED_PNL / COMMISSION / FUNDING_FEE
+        :param symbol: 交易对
+        :param limit: 每页数量 (最大1000)
+        """
+        endpoint = '/fapi/v1/income'
+        params = {'limit': limit}
+        if start_time is not None:
+            params['startTime'] = start_time
+        if end_time is not None:
+            params['endTime'] = end_time
+        if income_type:
+            params['incomeType'] = income_type
+        if symbol:
+            params['symbol'] = symbol
+        return self._send_request('GET', endpoint, params)
@@ -0,0 +1,143 @@
+import json
+from typing import List, Optional
+
+# 可选的高性能 JSON 库，未安装时使用标准库
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 程序中实际用到的交易规则过滤器
+USED_FILTERS = ('PRICE_FILTER', 'LOT_SIZE', 'MARKET_LOT_SIZE', 'MIN_NOTIONAL', 'PERCENT_PRICE')
+
+POSITION_FIELDS = ('symbol', 'positionAmt', 'entryPrice', 'unrealizedProfit', 'leverage')
+
+
+def backend_name():
+    """返回当前使用的 JSON 解码后端"""
+    if msgspec is not None:
+        return 'msgspec'
+    if orjson is not None:
+        return 'orjson'
+    return 'json'
+
+
+if orjson is not None:
+    loads = orjson.loads
+elif msgspec is not None:
+    loads = msgspec.json.decode
+else:
+    def loads(content):
+        return json.loads(content)
+
+
+if msgspec is not None:
+    # 只声明用到的字段，其余字段在解码时直接跳过，不会创建 Python 对象
+    class _Position(msgspec.Struct):
+        symbol: str
+        positionAmt: str
+        entryPrice: str
+        unrealizedProfit: str
+        leverage: str
+
+    class _Account(msgspec.Struct):
+        totalWalletBalance: str
+        totalUnrealizedProfit: str
+        positions: List[_Position] = []
+
+    # omit_defaults: 转换为字典时省略未出现的字段，与原始响应的过滤器字典一致
+    class _Filter(msgspec.Struct, omit_defaults=True):
+        filterType: str
+        minPrice: Optional[str] = None
+        maxPrice: Optional[str] = None
+        tickSize: Optional[str] = None
+        minQty: Optional[str] = None
+        maxQty: Optional[str] = None
+        stepSize: Optional[str] = None
+        notional: Optional[str] = None
+        multiplierUp: Optional[str] = None
+        multiplierDown: Optional[str] = None
+
+    class _Symbol(msgspec.Struct):
+        symbol: str
+        status: str
+        filters: List[_Filter] = []
+
+    class _ExchangeInfo(msgspec.Struct):
+        symbols: List[_Symbol] = []
+
+    _account_decoder = msgspec.json.Decoder(_Account)
+    _exchange_info_decoder = msgspec.json.Decoder(_ExchangeInfo)
+
+
+def _is_open(position_amt):
+    return float(position_amt) != 0
+
+
+def decode_account(content):
+    """
+    解码 /fapi/v2/account 响应，只保留账户总览字段和非零持仓
+    :param content: 响应体 (bytes)
+    :return: {'totalWalletBalance', 'totalUnrealizedProfit', 'positions': [非零持仓]}
+    """
+    if msgspec is not None:
+        account = _account_decoder.decode(content)
+        return {
+            'totalWalletBalance': account.totalWalletBalance,
+            'totalUnrealizedProfit': account.totalUnrealizedProfit,
+            'positions': [
+                {
+                    'symbol': p.symbol,
+                    'positionAmt': p.positionAmt,
+                    'entryPrice': p.entryPrice,
+                    'unrealizedProfit': p.unrealizedProfit,
+                    'leverage': p.leverage
+                }
+                for p in account.positions if _is_open(p.positionAmt)
+            ]
+        }
+
+    account = loads(content)
+    if 'positions' not in account:
+        return account
+    return {
+        'totalWalletBalance': account['totalWalletBalance'],
+        'totalUnrealizedProfit': account['totalUnrealizedProfit'],
+        'positions': [
+            {field: p[field] for field in POSITION_FIELDS}
+            for p in account['positions'] if _is_open(p['positionAmt'])
+        ]
+    }
+
+
+def decode_exchange_info(content):
+    """
+    解码 /fapi/v1/exchangeInfo 响应，只保留交易对名称、状态和用到的过滤器
+    :param content: 响应体 (bytes)
+    :return: {'symbols': [{'symbol', 'status', 'filters'}]}
+    """
+    if msgspec is not None:
+        info = _exchange_info_decoder.decode(content)
+        for s in info.symbols:
+            s.filters = [f for f in s.filters if f.filterType in USED_FILTERS]
+        # 一次转换整棵结构，避免逐个过滤器构建字典
+        return msgspec.to_builtins(info)
+
+    info = loads(content)
+    if 'symbols' not in info:
+        return info
+    return {
+        'symbols': [
+            {
+                'symbol': s['symbol'],
+                'status': s['status'],
+                'filters': [f for f in s['filters'] if f['filterType'] in USED_FILTERS]
+            }
+            for s in info['symbols']
+        ]
+    }
@@ -0,0 +1,384 @@
+import gzip
+import json
+import time
+import heapq
+from itertools import count
+
+DEFAULT_BALANCE = 10000.0
+DEFAULT_LEVERAGE = 20
+MAKER_FEE = 0.0002
+TAKER_FEE = 0.0004
+# 账户信息中余额、持仓数量和价格的小数位数 (与币安接口返回一致)
+ACCOUNT_DECIMALS = 8
+
+
+def _decimal_str(value, decimals=ACCOUNT_DECIMALS):
+    """按固定小数位输出数值字符串，去掉浮点累加误差 (例如 -4.659999999999945 -> "-4.66000000")"""
+    # 加 0.0 把 -0.0 变成 0.0
+    return f"{round(value, decimals) + 0.0:.{decimals}f}"
+
+
+class PaperOrder:
+    """模拟订单"""
+
+    __slots__ = ('order_id', 'symbol', 'side', 'order_type', 'price', 'quantity',
+                 'executed_qty', 'cum_quote', 'status', 'reduce_only', 'margin', 'update_time')
+
+    def __init__(self, order_id, symbol, side, order_type, price, quantity, reduce_only):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.order_type = order_type
+        self.price = price
+        self.quantity = quantity
+        self.executed_qty = 0.0
+        self.cum_quote = 0.0
+        self.status = 'NEW'
+        self.reduce_only = reduce_only
+        self.margin = 0.0
+        self.update_time = 0
+
+    def to_dict(self):
+        """转换为与币安下单接口一致的返回格式"""
+        avg_price = self.cum_quote / self.executed_qty if self.executed_qty else 0.0
+        return {
+            'orderId': self.order_id,
+            'symbol': self.symbol,
+            'status': self.status,
+            'side': self.side,
+            'type': self.order_type,
+            'price': str(self.price or 0),
+            'avgPrice': str(avg_price),
+            'origQty': str(self.quantity),
+            'executedQty': str(self.executed_qty),
+            'cumQuote': str(self.cum_quote),
+            'reduceOnly': self.reduce_only,
+            'updateTime': self.update_time
+        }
+
+
+class PaperExchange:
+    """
+    模拟撮合引擎
+    每个交易对维护价格-时间优先的买卖挂单簿，行情价格穿越挂单价格时按挂单价成交；
+    市价单和可立即成交的限价单按当前价格成交。持仓为单向模式，盈亏和保证金的计算方式
+    与 format_position_info 一致。
+    """
+
+    def __init__(self, balance=DEFAULT_BALANCE, maker_fee=MAKER_FEE, taker_fee=TAKER_FEE):
+        self.wallet_balance = float(balance)
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.prices = {}
+        # 交易对 -> [持仓数量, 开仓均价]
+        self.positions = {}
+        self.leverage = {}
+        self.orders = {}
+        self.open_order_margin = 0.0
+        # 交易对 -> (买单堆, 卖单堆)，买单以负价格入堆
+        self._books = {}
+        self._ids = count(1)
+        self._seq = count()
+
+    # ---- 行情 ----
+
+    def on_price(self, symbol, price):
+        """处理行情价格，撮合被穿越的挂单"""
+        self.prices[symbol] = price
+        book = self._books.get(symbol)
+        if book is None:
+            return
+        bids, asks = book
+        while bids and -bids[0][0] >= price:
+            order = heapq.heappop(bids)[2]
+            if order.status == 'NEW':
+                self._fill_resting(order)
+        while asks and asks[0][0] <= price:
+            order = heapq.heappop(asks)[2]
+            if order.status == 'NEW':
+                self._fill_resting(order)
+
+    def feed(self, ticks):
+        """
+        回放行情
+        :param ticks: 可迭代的 (交易对, 价格)
+        """
+        on_price = self.on_price
+        for symbol, price in ticks:
+            on_price(symbol, price)
+
+    # ---- 账户 ----
+
+    def get_leverage(self, symbol):
+        return self.leverage.get(symbol, DEFAULT_LEVERAGE)
+
+    def set_leverage(self, symbol, leverage):
+        if not (1 <= leverage <= 125):
+            raise ValueError("杠杆倍数必须在1-125之间")
+        self.leverage[symbol] = leverage
+
+    def unrealized_profit(self, symbol):
+        position = self.positions.get(symbol)
+        if not position or not position[0]:
+            return 0.0
+        amt, entry = position
+        return amt * (self.prices.get(symbol, entry) - entry)
+
+    def position_margin(self):
+        """持仓占用的起始保证金"""
+        return sum(abs(amt) * entry / self.get_leverage(symbol)
+                   for symbol, (amt, entry) in self.positions.items() if amt)
+
+    def available_balance(self):
+        total_unrealized = sum(self.unrealized_profit(symbol) for symbol in self.positions)
+        return self.wallet_balance + total_unrealized - self.position_margin() - self.open_order_margin
+
+    # ---- 订单 ----
+
+    def submit(self, symbol, side, order_type, quantity, price=None, reduce_only=False):
+        """
+        提交订单
+        :return: PaperOrder
+        """
+        if quantity <= 0:
+            raise ValueError("下单数量必须大于0")
+        if side not in ('BUY', 'SELL'):
+            raise ValueError(f"不支持的订单方向: {side}")
+        last_price = self.prices.get(symbol)
+        if last_price is None:
+            raise ValueError(f"{symbol} 没有行情价格，无法撮合")
+
+        position = self.positions.get(symbol)
+        amt = position[0] if position else 0.0
+        reducing = (amt > 0 and side == 'SELL') or (amt < 0 and side == 'BUY')
+        if reduce_only:
+            if not reducing:
+                raise ValueError("只减仓订单不能增加持仓")
+            quantity = min(quantity, abs(amt))
+
+        if order_type == 'MARKET':
+            fill_price = last_price
+        elif order_type == 'LIMIT':
+            if not price:
+                raise ValueError("限价单必须指定价格")
+            fill_price = None
+            if (side == 'BUY' and price >= last_price) or (side == 'SELL' and price <= last_price):
+                fill_price = last_price
+        else:
+            raise ValueError(f"不支持的订单类型: {order_type}")
+
+        # 检查保证金 (只对增加持仓的部分)
+        opening_qty = quantity - min(quantity, abs(amt)) if reducing else quantity
+        margin = 0.0
+        if opening_qty > 0:
+            margin = opening_qty * (fill_price or price) / self.get_leverage(symbol)
+            if margin > self.available_balance():
+                raise ValueError("可用保证金不足")
+
+        order = PaperOrder(next(self._ids), symbol, side, order_type, price, quantity, reduce_only)
+        order.update_time = int(time.time() * 1000)
+        self.orders[order.order_id] = order
+
+        if fill_price is not None:
+            self._fill(order, quantity, fill_price, self.taker_fee)
+        else:
+            order.margin = margin
+            self.open_order_margin += margin
+            book = self._books.get(symbol)
+            if book is None:
+                book = self._books[symbol] = ([], [])
+            if side == 'BUY':
+                heapq.heappush(book[0], (-price, next(self._seq), order))
+            else:
+                heapq.heappush(book[1], (price, next(self._seq), order))
+        return order
+
+    def cancel(self, order_id):
+        """撤销挂单"""
+        order = self.orders.get(order_id)
+        if order is None:
+            raise ValueError(f"订单 {order_id} 不存在")
+        if order.status != 'NEW':
+            raise ValueError(f"订单 {order_id} 状态为 {order.status}，无法撤销")
+        order.status = 'CANCELED'
+        self.open_order_margin -= order.margin
+        order.margin = 0.0
+        return order
+
+    def _fill_resting(self, order):
+        """
+        挂单被穿越时按挂单价成交
+        只减仓挂单按成交时的持仓重新检查：持仓已平或方向相同时订单过期，数量超过持仓时只成交持仓部分
+        """
+        quantity = order.quantity
+        if order.reduce_only:
+            position = self.positions.get(order.symbol)
+            amt = position[0] if position else 0.0
+            if not ((amt > 0 and order.side == 'SELL') or (amt < 0 and order.side == 'BUY')):
+                order.status = 'EXPIRED'
+                self.open_order_margin -= order.margin
+                order.margin = 0.0
+                return
+            quantity = min(quantity, abs(amt))
+        self._fill(order, quantity, order.price, self.maker_fee)
+
+    def _fill(self, order, quantity, price, fee_rate):
+        symbol = order.symbol
+        signed_qty = quantity if order.side == 'BUY' else -quantity
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = [0.0, 0.0]
+        amt, entry = position
+
+        if amt == 0 or (amt > 0) == (signed_qty > 0):
+            new_amt = amt + signed_qty
+            entry = (abs(amt) * entry + quantity * price) / abs(new_amt)
+        else:
+            closing = min(quantity, abs(amt))
+            self.wallet_balance += closing * (price - entry) * (1 if amt > 0 else -1)
+            new_amt = amt + signed_qty
+            if abs(new_amt) < 1e-12:
+                new_amt = 0.0
+                entry = 0.0
+            elif (new_amt > 0) != (amt > 0):
+                # 反手开仓
+                entry = price
+
+        position[0] = new_amt
+        position[1] = entry
+        self.wallet_balance -= quantity * price * fee_rate
+
+        if order.margin:
+            self.open_order_margin -= order.margin
+            order.margin = 0.0
+        order.executed_qty += quantity
+        order.cum_quote += quantity * price
+        order.status = 'FILLED'
+
+
+class PaperClient:
+    """
+    模拟交易客户端，接口与 BinanceClient 一致，可直接用于 TradingUtils 和测试交易菜单
+    :param market_client: 提供行情和交易规则的 BinanceClient (只调用公开接口)
+    :param exchange_info: 不使用 market_client 时提供的交易规则
+    :param balance: 初始 USDT 余额
+    """
+
+    def __init__(self, market_client=None, exchange_info=None, balance=DEFAULT_BALANCE):
+        self.market_client = market_client
+        self.exchange_info = exchange_info or {'symbols': []}
+        self.exchange = PaperExchange(balance)
+        self.testnet = getattr(market_client, 'testnet', False)
+
+    def _refresh_prices(self):
+        if self.market_client is not None:
+            for item in self.market_client.get_all_mark_prices():
+                self.exchange.on_price(item['symbol'], float(item['markPrice']))
+
+    def _refresh_price(self, symbol):
+        # 下单前刷新该交易对的标记价格，市价单按最新价格成交；回放模式使用 feed 推送的价格
+        if self.market_client is not None:
+            self.get_mark_price(symbol)
+
+    def feed(self, ticks):
+        """回放行情，:param ticks: 可迭代的 (交易对, 价格)"""
+        self.exchange.feed(ticks)
+
+    def get_exchange_info(self):
+        """获取交易规则"""
+        if self.market_client is not None:
+            return self.market_client.get_exchange_info()
+        return self.exchange_info
+
+    def get_mark_price(self, symbol):
+        """获取标记价格"""
+        if self.market_client is not None:
+            info = self.market_client.get_mark_price(symbol)
+            self.exchange.on_price(symbol, float(info['markPrice']))
+            return info
+        if symbol not in self.exchange.prices:
+            raise ValueError(f"{symbol} 没有行情价格")
+        return {'symbol': symbol, 'markPrice': str(self.exchange.prices[symbol])}
+
+    def get_all_mark_prices(self):
+        """获取全部交易对的标记价格"""
+        if self.market_client is not None:
+            mark_prices = self.market_client.get_all_mark_prices()
+            for item in mark_prices:
+                self.exchange.on_price(item['symbol'], float(item['markPrice']))
+            return mark_prices
+        return [{'symbol': s, 'markPrice': str(p)} for s, p in self.exchange.prices.items()]
+
+    def get_klines(self, symbol, interval='1m', limit=500, start_time=None, end_time=None):
+        """获取K线 (转发给行情客户端)"""
+        if self.market_client is None:
+            raise ValueError("模拟交易未配置行情客户端，无法获取K线")
+        return self.market_client.get_klines(symbol, interval, limit, start_time, end_time)
+
+    def get_futures_account(self):
+        """获取账户信息，格式与 /fapi/v2/account 一致 (只包含非零持仓)"""
+        exchange = self.exchange
+        if any(amt for amt, _ in exchange.positions.values()) or exchange.open_order_margin:
+            self._refresh_prices()
+
+        positions = []
+        total_unrealized = 0.0
+        for symbol, (amt, entry) in exchange.positions.items():
+            if not amt:
+                continue
+            unrealized = exchange.unrealized_profit(symbol)
+            total_unrealized += unrealized
+            positions.append({
+                'symbol': symbol,
+                'positionAmt': _decimal_str(amt),
+                'entryPrice': _decimal_str(entry),
+                'unrealizedProfit': _decimal_str(unrealized),
+                'leverage': str(exchange.get_leverage(symbol))
+            })
+        return {
+            'totalWalletBalance': _decimal_str(exchange.wallet_balance),
+            'totalUnrealizedProfit': _decimal_str(total_unrealized),
+            'availableBalance': _decimal_str(exchange.available_balance()),
+            'positions': positions
+        }
+
+    def place_order(self, symbol, side, order_type, quantity, price=None, reduce_only=False, resp_type=None):
+        """下单函数，参数与 BinanceClient.place_order 一致"""
+        self._refresh_price(symbol)
+        order = self.exchange.submit(
+            symbol, side, order_type, float(quantity),
+            float(price) if price else None, reduce_only
+        )
+        return order.to_dict()
+
+    def cancel_order(self, symbol, order_id):
+        """撤销订单"""
+        return self.exchange.cancel(int(order_id)).to_dict()
+
+    def get_order(self, symbol, order_id):
+        """查询订单"""
+        order = self.exchange.orders.get(int(order_id))
+        if order is None:
+            raise ValueError(f"订单 {order_id} 不存在")
+        return order.to_dict()
+
+    def change_leverage(self, symbol, leverage):
+        """修改杠杆倍数"""
+        self.exchange.set_leverage(symbol, int(leverage))
+        return {'symbol': symbol, 'leverage': int(leverage)}
+
+
+def ticks_from_cassette(path):
+    """
+    从录制文件中提取标记价格行情，用于回放撮合
+    :param path: RecordingTransport 录制的文件
+    :return: 生成 (交易对, 价格)
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if not record['key'].startswith('GET /fapi/v1/premiumIndex') or record['status'] != 200:
+                continue
+            body = json.loads(record['body'])
+            for item in body if isinstance(body, list) else [body]:
+                yield item['symbol'], float(item['markPrice'])
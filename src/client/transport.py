@@ -0,0 +1,160 @@
+import json
+import gzip
+import time
+import threading
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+# 签名相关参数每次请求都不同，录制和回放时不参与匹配
+VOLATILE_PARAMS = ('timestamp', 'signature', 'recvWindow')
+
+
+class TransportError(Exception):
+    """传输层错误 (网络异常或回放记录缺失)"""
+
+
+class TransportResponse:
+    """传输层响应，接口与 requests.Response 中用到的部分保持一致"""
+
+    __slots__ = ('status_code', 'headers', 'content', 'elapsed')
+
+    def __init__(self, status_code, headers, content, elapsed=0.0):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def request_key(method, url, params):
+    """生成请求匹配键: 方法 + 路径 + 排序后的稳定参数"""
+    stable = sorted((k, str(v)) for k, v in (params or {}).items() if k not in VOLATILE_PARAMS)
+    return f"{method.upper()} {urlsplit(url).path}?{'&'.join(f'{k}={v}' for k, v in stable)}"
+
+
+class HttpTransport:
+    """基于 requests 的实时 HTTP 传输，复用连接"""
+
+    def __init__(self, timeout=10):
+        import requests
+        self._requests = requests
+        self.session = requests.Session()
+        self.timeout = timeout
+
+    def request(self, method, url, headers=None, params=None):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, headers=headers, params=params, timeout=self.timeout)
+        except self._requests.exceptions.RequestException as e:
+            raise TransportError(str(e))
+        return TransportResponse(
+            response.status_code,
+            dict(response.headers),
+            response.content,
+            time.perf_counter() - started
+        )
+
+
+class RecordingTransport:
+    """
+    录制传输: 将请求和响应 (含响应头和耗时) 写入 gzip 压缩的 JSON 行文件
+    :param path: 录制文件路径，例如 session.jsonl.gz
+    :param inner: 实际执行请求的传输，默认使用 HttpTransport
+    """
+
+    def __init__(self, path, inner=None):
+        self.path = path
+        self.inner = inner or HttpTransport()
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers=None, params=None):
+        offset = time.perf_counter() - self._started
+        response = self.inner.request(method, url, headers=headers, params=params)
+        record = {
+            'key': request_key(method, url, params),
+            'offset': round(offset, 6),
+            'elapsed': round(response.elapsed, 6),
+            'status': response.status_code,
+            'headers': response.headers,
+            'body': response.content.decode('utf-8')
+        }
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+        return response
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayTransport:
+    """
+    回放传输: 按请求匹配键依次返回录制的响应，完全离线运行
+    :param path: 录制文件路径
+    :param speed: 回放速度倍数，1 按录制时的请求间隔和耗时，10 为十倍速，0 表示不等待
+    :param repeat_last: 某个请求的录制响应用完后是否重复返回最后一条 (适用于轮询)
+    """
+
+    def __init__(self, path, speed=0, repeat_last=True):
+        self.path = path
+        self.speed = speed
+        self.repeat_last = repeat_last
+        self._queues = defaultdict(deque)
+        self._last = {}
+        self._lock = threading.Lock()
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._queues[record['key']].append(record)
+        # 与 RecordingTransport 一样从创建时开始计时，offset 为相对这一时刻的发送时间
+        self._started = time.perf_counter()
+
+    def request(self, method, url, headers=None, params=None):
+        key = request_key(method, url, params)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                record = queue.popleft()
+                self._last[key] = record
+            elif self.repeat_last and key in self._last:
+                record = self._last[key]
+            else:
+                raise TransportError(f"回放文件中没有匹配的请求: {key}")
+
+        if self.speed:
+            # 先等到录制时的发送时间 (按倍速缩放)，再等待响应耗时；已经晚于录制时间的请求不再补等
+            delay = self._started + record.get('offset', 0.0) / self.speed - time.perf_counter()
+            time.sleep(max(delay, 0.0) + record['elapsed'] / self.speed)
+        return TransportResponse(
+            record['status'],
+            record['headers'],
+            record['body'].encode('utf-8'),
+            record['elapsed']
+        )
+
+    def close(self):
+        pass
+
+
+def create_transport(record=None, replay=None, replay_speed=0):
+    """
+    根据命令行参数创建传输层
+    :param record: 录制文件路径
+    :param replay: 回放文件路径
+    :param replay_speed: 回放速度倍数
+    :return: 传输实例，未指定时返回 None (使用默认实时传输)
+    """
+    if record and replay:
+        raise ValueError("不能同时录制和回放")
+    if record:
+        return RecordingTransport(record)
+    if replay:
+        return ReplayTransport(replay, speed=replay_speed)
+    return None
@@ -47,12 +47,22 @@ def display_account_info(client):
             print("\n详细错误信息:")
             traceback.print_tb(e.__traceback__)
 
-def run_mainnet(api_key, api_secret):
-    """运行主网程序"""
+def run_mainnet(api_key, api_secret, transport=None, trading_utils=None, indicators=None, display_options=None):
+    """
+    运行主网程序
+    :param transport: 传输层，用于录制或离线回放
+    :param trading_utils: 已预热的 TradingUtils (交互式菜单中复用)
+    :param indicators: K线周期，指定时在持仓下方显示该周期的指标
+    :param display_options: 持仓表格的输出格式、排序和分页 (TradingUtils.display_account_info 的参数)
+    """
     try:
-        client = BinanceClient(api_key, api_secret, testnet=False)
-        trading_utils = TradingUtils(client)
-        trading_utils.display_account_info(is_testnet=False)
+        if trading_utils is None:
+            client = BinanceClient(api_key, api_secret, testnet=False, transport=transport)
+            trading_utils = TradingUtils(client)
+        display_options = display_options or {}
+        trading_utils.display_account_info(is_testnet=False, **display_options)
+        if indicators:
+            trading_utils.display_indicators(indicators)
     except Exception as e:
         print(f"程序运行错误: {str(e)}")
         sys.exit(1) 
\ No newline at end of file
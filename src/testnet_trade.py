@@ -1,7 +1,8 @@
 import sys
 from src.client.binance_client import BinanceClient
+from src.client.paper_client import PaperClient
 from src.utils.formatter import format_number
-from src.utils.trading import TradingUtils
+from src.utils.trading import TradingUtils, ORDER_PRICE_MAX_AGE
 
 def place_test_order(client, trading_utils, symbol, side, quantity, use_market_order=False):
     """
@@ -15,7 +16,7 @@ def place_test_order(client, trading_utils, symbol, side, quantity, use_market_o
         print(f"\n已设置杠杆倍数: {leverage}x")
         
         # 获取当前市价和币对信息
-        info = trading_utils.get_symbol_info(symbol)
+        info = trading_utils.get_symbol_info(symbol, max_age=ORDER_PRICE_MAX_AGE)
         mark_price = info['price']
         
         # 验证并调整订单参数
@@ -55,6 +56,7 @@ def place_test_order(client, trading_utils, symbol, side, quantity, use_market_o
                 price=formatted_price
             )
         
+        trading_utils.invalidate_account()
         print(f"\n=== 订单执行成功 ===")
         print(f"交易对: {order['symbol']}")
         print(f"方向: {'做多' if side == 'BUY' else '做空'}")
@@ -88,6 +90,7 @@ def place_test_order(client, trading_utils, symbol, side, quantity, use_market_o
                 price=formatted_price
             )
             
+            trading_utils.invalidate_account()
             print(f"\n=== 订单执行成功 ===")
             print(f"交易对: {order['symbol']}")
             print(f"方向: {'做多' if side == 'BUY' else '做空'}")
@@ -213,6 +216,7 @@ def interactive_test_trade(client, trading_utils):
                 leverage = int(leverage)
                 if 1 <= leverage <= 125:
                     result = client.change_leverage(symbol, leverage)
+                    trading_utils.invalidate_account()
                     print(f"杠杆修改成功: {result['leverage']}x")
                 else:
                     print("杠杆倍数必须在1-125之间")
@@ -232,13 +236,37 @@ def interactive_test_trade(client, trading_utils):
         else:
             print("无效的选择，请重试")
 
-def run_testnet(api_key, api_secret):
-    """运行测试网程序"""
+def run_testnet(api_key, api_secret, transport=None, trading_utils=None):
+    """
+    运行测试网程序
+    :param transport: 传输层，用于录制或离线回放
+    :param trading_utils: 已预热的 TradingUtils (交互式菜单中复用)
+    """
+    try:
+        if trading_utils is None:
+            client = BinanceClient(api_key, api_secret, testnet=True, transport=transport)
+            trading_utils = TradingUtils(client)
+        client = trading_utils.client
+        trading_utils.display_account_info(is_testnet=True)
+        interactive_test_trade(client, trading_utils)
+    except Exception as e:
+        print(f"程序运行错误: {str(e)}")
+        sys.exit(1) 
+
+def run_paper(balance=10000.0, transport=None):
+    """
+    运行模拟交易程序: 使用主网公开行情撮合，不需要API密钥
+    :param balance: 初始 USDT 余额
+    :param transport: 传输层，用于录制或离线回放行情
+    """
     try:
-        client = BinanceClient(api_key, api_secret, testnet=True)
+        market_client = BinanceClient('', '', testnet=False, transport=transport)
+        client = PaperClient(market_client=market_client, balance=balance)
+        # 不开启后台预取: 预取线程读取价格会触发本地撮合，与菜单下单并发修改模拟账户
         trading_utils = TradingUtils(client)
+        print("当前为模拟交易环境，订单在本地撮合")
         trading_utils.display_account_info(is_testnet=True)
         interactive_test_trade(client, trading_utils)
     except Exception as e:
         print(f"程序运行错误: {str(e)}")
-        sys.exit(1) 
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,477 @@
+import os
+import json
+import time
+import subprocess
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from src.utils.price_board import PriceBoard, board_name
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_ALERT_FILE = 'alerts.json'
+
+ALERT_KINDS = ('price', 'percent', 'roi')
+ALERT_DIRECTIONS = ('above', 'below')
+
+
+@contextmanager
+def _file_lock(path):
+    """跨进程文件锁，保护告警文件的读取-合并-写入"""
+    with open(f"{path}.lock", 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def roi_to_price(entry_price, position_amt, leverage, roi):
+    """
+    将收益率阈值换算为触发价格
+    收益率公式与 format_position_info 一致: roi = 方向 * (标记价 - 开仓价) / 开仓价 * 杠杆 * 100
+    :param entry_price: 开仓价
+    :param position_amt: 持仓数量 (正数为多, 负数为空)
+    :param leverage: 杠杆倍数
+    :param roi: 收益率阈值 (百分比)
+    :return: 触发价格
+    """
+    sign = 1 if position_amt > 0 else -1
+    return entry_price * (1 + sign * roi / (100 * leverage))
+
+
+class _LevelBook:
+    """单个交易对单一方向的触发价位表，价位与告警ID保存在两个平行的有序数组中"""
+
+    __slots__ = ('levels', 'ids')
+
+    def __init__(self):
+        self.levels = []
+        self.ids = []
+
+    def insert(self, level, alert_id):
+        i = bisect_right(self.levels, level)
+        self.levels.insert(i, level)
+        self.ids.insert(i, alert_id)
+
+    def remove(self, level, alert_id):
+        i = bisect_left(self.levels, level)
+        j = bisect_right(self.levels, level)
+        for k in range(i, j):
+            if self.ids[k] == alert_id:
+                del self.levels[k]
+                del self.ids[k]
+                return True
+        return False
+
+    def take(self, i, j, keep):
+        """取出 [i, j) 区间的告警ID，只保留 keep 判断为真的条目"""
+        fired = self.ids[i:j]
+        kept = [(lvl, aid) for lvl, aid in zip(self.levels[i:j], fired) if keep(aid)]
+        self.levels[i:j] = [lvl for lvl, _ in kept]
+        self.ids[i:j] = [aid for _, aid in kept]
+        return fired
+
+    def __len__(self):
+        return len(self.levels)
+
+
+class AlertEngine:
+    """
+    价格与盈亏告警引擎
+    所有告警最终都被换算为触发价位，按交易对和方向保存在有序数组中。
+    每次价格更新只需二分查找被穿越的价位区间，评估成本与告警总数无关。
+    告警文件可能被多个进程同时使用 (alert add 与 alert watch)，保存时在文件锁内
+    重新读取文件，只把本进程的新增、修改和删除合并进去。
+    """
+
+    def __init__(self, store_path=DEFAULT_ALERT_FILE):
+        self.store_path = store_path
+        self.alerts = {}
+        self.last_prices = {}
+        self._books = {}
+        self._next_id = 1
+        # 上次同步时文件中的告警ID，以及之后本进程修改、删除的告警和更新过的价格
+        self._synced = set()
+        self._dirty = set()
+        self._removed = set()
+        self._dirty_prices = set()
+        self._mtime = None
+
+    # ---- 持久化 ----
+
+    def load(self):
+        """从文件加载告警"""
+        self._sync(write=False)
+        return self
+
+    def save(self):
+        """与文件中的告警合并后保存"""
+        self._sync(write=True)
+
+    def reload_if_changed(self):
+        """
+        文件被其它进程修改时重新合并 (例如监控期间新增了告警)
+        :return: 是否重新加载
+        """
+        if self._file_mtime() == self._mtime:
+            return False
+        self._sync(write=False)
+        return True
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.store_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read_file(self):
+        if not os.path.exists(self.store_path):
+            return {}
+        try:
+            with open(self.store_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            raise ValueError(f"告警文件 {self.store_path} 格式不正确")
+
+    def _sync(self, write):
+        with _file_lock(self.store_path):
+            data = self._read_file()
+            disk = {alert['id']: alert for alert in data.get('alerts', [])}
+
+            # 其它进程删除的告警 (本进程新增、尚未保存的除外)
+            for alert_id in list(self.alerts):
+                if alert_id in self._synced and alert_id not in disk:
+                    self._unindex(self.alerts.pop(alert_id))
+                    self._dirty.discard(alert_id)
+            for alert_id in self._removed:
+                disk.pop(alert_id, None)
+
+            next_id = max([int(data.get('next_id', 1)), self._next_id] + [i + 1 for i in disk])
+            # 本进程新增的告警与其它进程新增的告警ID冲突时重新编号
+            for alert_id in sorted(self._dirty - self._synced):
+                if alert_id in disk:
+                    alert = self.alerts.pop(alert_id)
+                    self._unindex(alert)
+                    alert['id'] = next_id
+                    next_id += 1
+                    self.alerts[alert['id']] = alert
+                    self._index(alert)
+                    self._dirty.discard(alert_id)
+                    self._dirty.add(alert['id'])
+            self._next_id = next_id
+
+            # 本进程没有修改的告警以文件为准 (包括其它进程新增的告警)
+            for alert_id, alert in disk.items():
+                if alert_id in self._dirty:
+                    continue
+                current = self.alerts.get(alert_id)
+                if current == alert:
+                    continue
+                if current is not None:
+                    self._unindex(current)
+                self.alerts[alert_id] = alert
+                self._index(alert)
+
+            last_prices = {k: float(v) for k, v in data.get('last_prices', {}).items()}
+            for symbol in self._dirty_prices:
+                last_prices[symbol] = self.last_prices[symbol]
+            self.last_prices = last_prices
+
+            if write:
+                data = {
+                    'next_id': self._next_id,
+                    'last_prices': self.last_prices,
+                    'alerts': list(self.alerts.values())
+                }
+                tmp_path = f"{self.store_path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.store_path)
+                self._synced = set(self.alerts)
+                self._dirty.clear()
+                self._removed.clear()
+                self._dirty_prices.clear()
+            else:
+                self._synced = set(disk)
+            self._mtime = self._file_mtime()
+
+    # ---- 索引维护 ----
+
+    def _book(self, symbol, direction):
+        books = self._books.get(symbol)
+        if books is None:
+            books = self._books[symbol] = {'above': _LevelBook(), 'below': _LevelBook()}
+        return books[direction]
+
+    def _index(self, alert):
+        if alert.get('level') is not None:
+            self._book(alert['symbol'], alert['trigger']).insert(alert['level'], alert['id'])
+
+    def _unindex(self, alert):
+        if alert.get('level') is not None:
+            self._book(alert['symbol'], alert['trigger']).remove(alert['level'], alert['id'])
+
+    # ---- 告警管理 ----
+
+    def add_alert(self, symbol, kind, direction, value, recurring=False, hooks=None,
+                  reference_price=None, position=None):
+        """
+        添加告警
+        :param symbol: 交易对
+        :param kind: 告警类型 ("price" 价格穿越, "percent" 涨跌幅, "roi" 持仓收益率)
+        :param direction: 方向 ("above" 或 "below")
+        :param value: 阈值 (价格 / 百分比 / 收益率百分比)
+        :param recurring: 是否重复触发，否则触发一次后删除
+        :param hooks: 触发后执行的钩子列表，例如 ["stdout", "file:alerts.log", "cmd:notify-send 告警"]
+        :param reference_price: 涨跌幅告警的基准价格
+        :param position: 收益率告警使用的持仓信息 (币安账户接口中的持仓字典)
+        :return: 告警字典
+        """
+        if kind not in ALERT_KINDS:
+            raise ValueError(f"不支持的告警类型: {kind}")
+        if direction not in ALERT_DIRECTIONS:
+            raise ValueError(f"不支持的告警方向: {direction}")
+
+        alert = {
+            'id': self._next_id,
+            'symbol': symbol.upper(),
+            'kind': kind,
+            'direction': direction,
+            'value': float(value),
+            'recurring': bool(recurring),
+            'hooks': list(hooks or ['stdout']),
+            'created_at': int(time.time() * 1000),
+            'reference_price': None,
+            'position': None,
+            'trigger': direction,
+            'level': None,
+            'fired_count': 0,
+            'last_fired_at': None
+        }
+
+        if kind == 'price':
+            alert['level'] = float(value)
+        elif kind == 'percent':
+            if not reference_price:
+                raise ValueError("涨跌幅告警需要基准价格")
+            self._rebase_percent(alert, float(reference_price))
+        else:
+            if position is not None:
+                self._apply_position(alert, position)
+
+        if reference_price:
+            self.last_prices[alert['symbol']] = float(reference_price)
+            self._dirty_prices.add(alert['symbol'])
+
+        self._next_id += 1
+        self.alerts[alert['id']] = alert
+        self._dirty.add(alert['id'])
+        self._index(alert)
+        return alert
+
+    def remove_alert(self, alert_id):
+        """删除告警"""
+        alert = self.alerts.pop(alert_id, None)
+        if alert is None:
+            raise ValueError(f"告警 {alert_id} 不存在")
+        self._unindex(alert)
+        self._dirty.discard(alert_id)
+        self._removed.add(alert_id)
+        return alert
+
+    def _rebase_percent(self, alert, reference_price):
+        pct = abs(alert['value']) / 100
+        alert['reference_price'] = reference_price
+        if alert['direction'] == 'above':
+            alert['level'] = reference_price * (1 + pct)
+        else:
+            alert['level'] = reference_price * (1 - pct)
+
+    def _apply_position(self, alert, position):
+        """根据持仓计算收益率告警的触发价位，无持仓时告警暂停"""
+        position_amt = float(position['positionAmt']) if position else 0.0
+        if position_amt == 0:
+            alert['position'] = None
+            alert['level'] = None
+            return
+
+        entry_price = float(position['entryPrice'])
+        leverage = float(position['leverage'])
+        alert['position'] = {
+            'positionAmt': position_amt,
+            'entryPrice': entry_price,
+            'leverage': leverage
+        }
+        alert['level'] = roi_to_price(entry_price, position_amt, leverage, alert['value'])
+        # 空单收益率上升对应价格下跌
+        if position_amt > 0:
+            alert['trigger'] = alert['direction']
+        else:
+            alert['trigger'] = 'below' if alert['direction'] == 'above' else 'above'
+
+    def has_roi_alerts(self):
+        return any(a['kind'] == 'roi' for a in self.alerts.values())
+
+    def update_positions(self, positions):
+        """
+        用最新持仓刷新收益率告警的触发价位
+        :param positions: 币安账户接口返回的持仓列表
+        """
+        by_symbol = {p['symbol']: p for p in positions if float(p['positionAmt']) != 0}
+        for alert in self.alerts.values():
+            if alert['kind'] != 'roi':
+                continue
+            self._unindex(alert)
+            self._apply_position(alert, by_symbol.get(alert['symbol']))
+            self._index(alert)
+            self._dirty.add(alert['id'])
+
+    def symbols(self):
+        """返回有活动告警的交易对"""
+        return [s for s, books in self._books.items() if books['above'] or books['below']]
+
+    # ---- 评估 ----
+
+    def on_price(self, symbol, price):
+        """
+        处理单个交易对的价格更新
+        :return: 本次触发的告警列表
+        """
+        last = self.last_prices.get(symbol)
+        self.last_prices[symbol] = price
+        self._dirty_prices.add(symbol)
+        books = self._books.get(symbol)
+        if last is None or books is None or price == last:
+            return []
+
+        if price > last:
+            book = books['above']
+            i = bisect_right(book.levels, last)
+            j = bisect_right(book.levels, price)
+        else:
+            book = books['below']
+            i = bisect_left(book.levels, price)
+            j = bisect_left(book.levels, last)
+        if i >= j:
+            return []
+
+        alerts = self.alerts
+        fired_ids = book.take(i, j, lambda aid: alerts[aid]['recurring'] and alerts[aid]['kind'] != 'percent')
+        now = int(time.time() * 1000)
+        fired = []
+        for alert_id in fired_ids:
+            alert = alerts[alert_id]
+            alert['fired_count'] += 1
+            alert['last_fired_at'] = now
+            fired.append(dict(alert, price=price))
+            if not alert['recurring']:
+                del alerts[alert_id]
+                self._dirty.discard(alert_id)
+                self._removed.add(alert_id)
+                continue
+            self._dirty.add(alert_id)
+            if alert['kind'] == 'percent':
+                # 重复的涨跌幅告警以触发价格为新的基准
+                self._rebase_percent(alert, price)
+                self._index(alert)
+        return fired
+
+    def on_prices(self, prices):
+        """
+        批量处理价格更新，只评估有告警的交易对
+        :param prices: {交易对: 价格}
+        """
+        fired = []
+        for symbol in self.symbols():
+            price = prices.get(symbol)
+            if price is not None:
+                fired.extend(self.on_price(symbol, price))
+        return fired
+
+
+def format_alert(alert):
+    """格式化告警描述"""
+    direction = '上穿' if alert['direction'] == 'above' else '下穿'
+    if alert['kind'] == 'price':
+        desc = f"价格{direction} {alert['value']}"
+    elif alert['kind'] == 'percent':
+        word = '上涨' if alert['direction'] == 'above' else '下跌'
+        desc = f"{word} {alert['value']}% (基准 {alert['reference_price']})"
+    else:
+        word = '高于' if alert['direction'] == 'above' else '低于'
+        desc = f"收益率{word} {alert['value']}%"
+    return f"#{alert['id']} {alert['symbol']} {desc}"
+
+
+def run_hooks(alert):
+    """执行告警钩子"""
+    message = f"[告警] {format_alert(alert)} 当前价格: {alert['price']}"
+    for hook in alert['hooks']:
+        try:
+            if hook == 'stdout':
+                print(message)
+            elif hook.startswith('file:'):
+                with open(hook[5:], 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(alert, ensure_ascii=False) + '\n')
+            elif hook.startswith('cmd:'):
+                env = dict(os.environ,
+                           ALERT_ID=str(alert['id']),
+                           ALERT_SYMBOL=alert['symbol'],
+                           ALERT_PRICE=str(alert['price']),
+                           ALERT_MESSAGE=message)
+                subprocess.Popen(hook[4:], shell=True, env=env)
+            else:
+                print(f"未知的告警钩子: {hook}")
+        except Exception as e:
+            print(f"执行告警钩子失败 ({hook}): {str(e)}")
+
+
+def watch_alerts(client, engine, interval=5, position_refresh=12):
+    """
+    持续拉取标记价格并评估告警
+    :param client: BinanceClient 实例
+    :param engine: AlertEngine 实例
+    :param interval: 轮询间隔 (秒)
+    :param position_refresh: 每隔多少轮刷新一次持仓 (用于收益率告警)
+    """
+    rounds = 0
+    board = PriceBoard.attach(board_name(client.testnet))
+    print(f"开始监控 {len(engine.alerts)} 个告警，按 Ctrl+C 退出")
+    try:
+        while engine.alerts:
+            if engine.reload_if_changed():
+                print(f"告警文件已更新，当前 {len(engine.alerts)} 个告警")
+            if engine.has_roi_alerts() and rounds % position_refresh == 0:
+                engine.update_positions(client.get_futures_account()['positions'])
+
+            prices = None
+            if board is not None:
+                # 行情进程运行时从共享内存读取，价格过期则回退到接口
+                prices = {s: board.get_mark_price(s) for s in engine.symbols()}
+                if None in prices.values():
+                    prices = None
+            if prices is None:
+                prices = {p['symbol']: float(p['markPrice']) for p in client.get_all_mark_prices()}
+            fired = engine.on_prices(prices)
+            for alert in fired:
+                run_hooks(alert)
+            if fired:
+                engine.save()
+
+            rounds += 1
+            time.sleep(interval)
+        print("所有告警已触发完毕")
+    finally:
+        engine.save()
@@ -0,0 +1,356 @@
+import json
+import math
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.table import Column
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '1d': 86_400_000
+}
+DAY_MS = 86_400_000
+STREAM_URL = 'wss://fstream.binance.com/stream?streams='
+TESTNET_STREAM_URL = 'wss://stream.binancefuture.com/stream?streams='
+# 币安单个连接最多订阅 200 个数据流
+STREAMS_PER_CONNECTION = 200
+
+
+class RingBuffer:
+    """定长环形缓冲区，同时维护窗口内的和与平方和"""
+
+    __slots__ = ('values', 'size', 'index', 'count', 'total', 'total_sq')
+
+    def __init__(self, size):
+        self.values = [0.0] * size
+        self.size = size
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value):
+        old = self.values[self.index]
+        if self.count == self.size:
+            self.total -= old
+            self.total_sq -= old * old
+        else:
+            self.count += 1
+        self.values[self.index] = value
+        self.total += value
+        self.total_sq += value * value
+        self.index = (self.index + 1) % self.size
+
+    @property
+    def full(self):
+        return self.count == self.size
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def stdev(self):
+        """样本标准差"""
+        if self.count < 2:
+            return 0.0
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class EMA:
+    """指数移动平均，前 period 根K线用简单平均作为初始值"""
+
+    __slots__ = ('period', 'alpha', 'value', '_seed')
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.value = None
+        self._seed = []
+
+    def update(self, price):
+        if self.value is None:
+            self._seed.append(price)
+            if len(self._seed) == self.period:
+                self.value = sum(self._seed) / self.period
+                self._seed = None
+        else:
+            self.value += self.alpha * (price - self.value)
+        return self.value
+
+
+class ATR:
+    """平均真实波幅 (Wilder 平滑)"""
+
+    __slots__ = ('period', 'value', 'prev_close', '_seed')
+
+    def __init__(self, period=14):
+        self.period = period
+        self.value = None
+        self.prev_close = None
+        self._seed = []
+
+    def update(self, high, low, close):
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        if self.value is None:
+            self._seed.append(true_range)
+            if len(self._seed) == self.period:
+                self.value = sum(self._seed) / self.period
+                self._seed = None
+        else:
+            self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+
+class SessionVWAP:
+    """成交量加权均价，按 UTC 自然日重置"""
+
+    __slots__ = ('session', 'pv', 'volume')
+
+    def __init__(self):
+        self.session = None
+        self.pv = 0.0
+        self.volume = 0.0
+
+    def update(self, open_time, high, low, close, volume):
+        session = open_time // DAY_MS
+        if session != self.session:
+            self.session = session
+            self.pv = 0.0
+            self.volume = 0.0
+        self.pv += (high + low + close) / 3 * volume
+        self.volume += volume
+        return self.value
+
+    @property
+    def value(self):
+        return self.pv / self.volume if self.volume else None
+
+
+class RollingVolatility:
+    """滚动波动率: 窗口内对数收益率的标准差 (百分比)"""
+
+    __slots__ = ('returns', 'prev_close')
+
+    def __init__(self, window=30):
+        self.returns = RingBuffer(window)
+        self.prev_close = None
+
+    def update(self, close):
+        if self.prev_close and close > 0:
+            self.returns.push(math.log(close / self.prev_close))
+        self.prev_close = close
+        return self.value
+
+    @property
+    def value(self):
+        return self.returns.stdev() * 100 if self.returns.count >= 2 else None
+
+
+class CandleSeries:
+    """
+    单个交易对单个周期的K线与指标
+    指标只在K线收盘时更新，每次更新为 O(1)；最近 capacity 根收盘K线保存在环形缓冲区中。
+    """
+
+    def __init__(self, symbol, interval, capacity=500, ema_fast=9, ema_slow=21, atr_period=14, vol_window=30):
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"不支持的K线周期: {interval}")
+        self.symbol = symbol
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.capacity = capacity
+        self.candles = [None] * capacity
+        self.count = 0
+        self.current = None
+        self.last_price = None
+        self.ema_fast = EMA(ema_fast)
+        self.ema_slow = EMA(ema_slow)
+        self.atr = ATR(atr_period)
+        self.vwap = SessionVWAP()
+        self.volatility = RollingVolatility(vol_window)
+
+    def _close(self, candle):
+        open_time, _, high, low, close, volume = candle
+        self.candles[self.count % self.capacity] = candle
+        self.count += 1
+        self.ema_fast.update(close)
+        self.ema_slow.update(close)
+        self.atr.update(high, low, close)
+        self.vwap.update(open_time, high, low, close, volume)
+        self.volatility.update(close)
+
+    def on_kline(self, open_time, open_, high, low, close, volume, closed):
+        """
+        处理K线数据 (REST 或 kline 数据流)
+        :param closed: K线是否已收盘
+        """
+        self.last_price = close
+        if self.current is not None and open_time > self.current[0]:
+            # 错过了收盘事件，按最后一次更新收盘
+            self._close(self.current)
+        candle = (open_time, open_, high, low, close, volume)
+        if closed:
+            if self.current is None or open_time >= self.current[0]:
+                self._close(candle)
+            self.current = None
+        else:
+            self.current = candle
+
+    def on_trade(self, trade_time, price, quantity):
+        """处理逐笔成交 (aggTrade 数据流)，按周期聚合为K线"""
+        self.last_price = price
+        open_time = trade_time - trade_time % self.interval_ms
+        current = self.current
+        if current is None or open_time > current[0]:
+            if current is not None:
+                self._close(current)
+            self.current = (open_time, price, price, price, price, quantity)
+        elif open_time == current[0]:
+            self.current = (open_time, current[1], max(current[2], price), min(current[3], price),
+                            price, current[5] + quantity)
+
+    def snapshot(self):
+        """当前指标值"""
+        atr = self.atr.value
+        ema_fast = self.ema_fast.value
+        ema_slow = self.ema_slow.value
+        trend = None
+        if ema_fast is not None and ema_slow is not None:
+            trend = '多' if ema_fast > ema_slow else '空'
+        return {
+            'symbol': self.symbol,
+            'interval': self.interval,
+            'last': self.last_price,
+            'ema_fast': ema_fast,
+            'ema_slow': ema_slow,
+            'trend': trend,
+            'atr': atr,
+            'atr_pct': atr / self.last_price * 100 if atr and self.last_price else None,
+            'vwap': self.vwap.value,
+            'volatility': self.volatility.value,
+            'candles': self.count
+        }
+
+
+class CandleEngine:
+    """多交易对、多周期的K线引擎"""
+
+    def __init__(self, **series_options):
+        self.series = {}
+        self.by_symbol = {}
+        self.series_options = series_options
+
+    def get(self, symbol, interval):
+        key = (symbol, interval)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = CandleSeries(symbol, interval, **self.series_options)
+            self.by_symbol.setdefault(symbol, []).append(series)
+        return series
+
+    def seed(self, client, symbols, interval, limit=200, workers=8):
+        """
+        用 /fapi/v1/klines 初始化K线和指标 (并发请求)
+        最后一根K线通常未收盘，作为当前K线保留
+        :return: {交易对: 错误信息}，请求失败的交易对会被跳过
+        """
+        def fetch(symbol):
+            try:
+                return symbol, client.get_klines(symbol, interval, limit), None
+            except Exception as e:
+                return symbol, None, str(e)
+
+        failed = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for symbol, klines, error in executor.map(fetch, symbols):
+                if error is not None:
+                    failed[symbol] = error
+                    continue
+                series = self.get(symbol, interval)
+                for i, k in enumerate(klines):
+                    series.on_kline(int(k[0]), float(k[1]), float(k[2]), float(k[3]),
+                                    float(k[4]), float(k[5]), closed=(i < len(klines) - 1))
+        return failed
+
+    def on_message(self, message):
+        """处理组合数据流消息 (kline 或 aggTrade)"""
+        data = message.get('data', message)
+        event = data.get('e')
+        if event == 'kline':
+            k = data['k']
+            self.get(data['s'], k['i']).on_kline(
+                int(k['t']), float(k['o']), float(k['h']), float(k['l']),
+                float(k['c']), float(k['v']), k['x']
+            )
+        elif event == 'aggTrade':
+            price = float(data['p'])
+            quantity = float(data['q'])
+            for series in self.by_symbol.get(data['s'], ()):
+                series.on_trade(int(data['T']), price, quantity)
+
+    def snapshots(self, interval=None):
+        return [s.snapshot() for (_, i), s in self.series.items() if interval is None or i == interval]
+
+
+async def _consume(engine, url, stop_at):
+    import websockets
+
+    loop = asyncio.get_running_loop()
+    while loop.time() < stop_at:
+        try:
+            async with websockets.connect(url, ping_interval=180) as ws:
+                while loop.time() < stop_at:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=max(0.1, stop_at - loop.time()))
+                    engine.on_message(json.loads(raw))
+        except asyncio.TimeoutError:
+            return
+        except Exception as e:
+            print(f"数据流连接中断，正在重连: {str(e)}")
+            await asyncio.sleep(1)
+
+
+def stream_candles(engine, symbols, interval, seconds, source='kline', testnet=False):
+    """
+    订阅 kline 或 aggTrade 数据流并持续更新K线引擎 (需要安装 websockets)
+    :param source: "kline" 或 "aggTrade"
+    :param seconds: 订阅时长 (秒)
+    :param testnet: 是否订阅测试网数据流 (与初始化K线的客户端保持一致)
+    """
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        raise ValueError("实时数据流需要安装 websockets: pip install websockets")
+
+    if source == 'kline':
+        streams = [f"{s.lower()}@kline_{interval}" for s in symbols]
+    else:
+        streams = [f"{s.lower()}@aggTrade" for s in symbols]
+    for symbol in symbols:
+        engine.get(symbol, interval)
+
+    async def run():
+        stop_at = asyncio.get_running_loop().time() + seconds
+        base_url = TESTNET_STREAM_URL if testnet else STREAM_URL
+        urls = [base_url + '/'.join(streams[i:i + STREAMS_PER_CONNECTION])
+                for i in range(0, len(streams), STREAMS_PER_CONNECTION)]
+        await asyncio.gather(*[_consume(engine, url, stop_at) for url in urls])
+
+    asyncio.run(run())
+
+
+# 指标表格列 (src.utils.table)
+INDICATOR_COLUMNS = [
+    Column('symbol', "交易对"),
+    Column('interval', "周期"),
+    Column('last', "最新价", 4),
+    Column('ema_fast', "EMA快", 4),
+    Column('ema_slow', "EMA慢", 4),
+    Column('trend', "趋势"),
+    Column('atr', "ATR", 4),
+    Column('atr_pct', "ATR%", 2, '%'),
+    Column('vwap', "VWAP", 4),
+    Column('volatility', "波动率", 3, '%')
+]
@@ -0,0 +1,348 @@
+import math
+import time
+import asyncio
+import inspect
+from src.utils.formatter import format_number
+from src.utils.trading import ORDER_PRICE_MAX_AGE
+
+STRATEGIES = ('twap', 'pov', 'iceberg')
+
+
+def step_precision(step_size):
+    """步长对应的小数位数"""
+    return len(str(step_size).rstrip('0').split('.')[-1]) if '.' in str(step_size) else 0
+
+
+def split_quantity(total, slices, rules, price):
+    """
+    将母单数量拆分为满足交易规则的子单数量
+    按步长取整，每个子单不超过最大下单量、不低于最小下单量和最小名义价值。
+    :param total: 母单数量
+    :param slices: 期望的子单数量
+    :param rules: TradingUtils.get_lot_rules 的返回值
+    :param price: 参考价格 (用于检查最小名义价值)
+    :return: (子单数量列表, 无法下单的零头数量)
+    """
+    step = rules['step_size'] or 10 ** -8
+    precision = step_precision(step)
+    total_units = int(math.floor(total / step + 1e-9))
+    max_units = int(math.floor(rules['max_qty'] / step + 1e-9)) if math.isfinite(rules['max_qty']) else total_units
+    min_size = max(rules['min_qty'], rules['min_notional'] / price if price else 0)
+    min_units = max(1, int(math.ceil(min_size / step - 1e-9)))
+
+    if total_units < min_units:
+        raise ValueError(f"数量 {total} 低于最小下单量或最小名义价值，无法下单")
+
+    # 子单数量不能使单笔超过最大下单量，也不能使单笔低于最小下单量
+    count = max(int(slices), 1, int(math.ceil(total_units / max(max_units, 1))))
+    count = min(count, total_units // min_units)
+
+    base, extra = divmod(total_units, count)
+    quantities = [round((base + (1 if i < extra else 0)) * step, precision) for i in range(count)]
+    remainder = round(total - total_units * step, precision + 2)
+    return quantities, remainder
+
+
+class TimerWheel:
+    """
+    哈希时间轮
+    所有定时任务按到期时间落入固定数量的槽位，单个协程按固定间隔推进，
+    调度和到期处理都是 O(1)，可同时驱动大量母单。
+    :param tick: 推进间隔 (秒)
+    :param slots: 槽位数量
+    """
+
+    def __init__(self, tick=0.1, slots=512):
+        self.tick = tick
+        self.slots = [[] for _ in range(slots)]
+        self.cursor = 0
+        self.pending = 0
+
+    def schedule(self, delay, callback, *args):
+        """在 delay 秒后执行 callback (普通函数或协程函数)"""
+        ticks = max(1, int(math.ceil(delay / self.tick)))
+        # offset 取 1..n: 整圈倍数的延迟落在当前槽位，转满 rounds + 1 圈后到期
+        rounds = (ticks - 1) // len(self.slots)
+        offset = ticks - rounds * len(self.slots)
+        self.slots[(self.cursor + offset) % len(self.slots)].append([rounds, callback, args])
+        self.pending += 1
+
+    async def run(self):
+        """推进时间轮直到没有待执行任务"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while self.pending:
+            next_tick += self.tick
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            self.cursor = (self.cursor + 1) % len(self.slots)
+            slot = self.slots[self.cursor]
+            due = [entry for entry in slot if entry[0] == 0]
+            if len(due) != len(slot):
+                kept = [entry for entry in slot if entry[0] > 0]
+                for entry in kept:
+                    entry[0] -= 1
+                self.slots[self.cursor] = kept
+            else:
+                self.slots[self.cursor] = []
+            for _, callback, args in due:
+                self.pending -= 1
+                result = callback(*args)
+                if inspect.isawaitable(result):
+                    # 协程执行期间也计入待执行任务，避免时间轮提前退出
+                    self.pending += 1
+                    asyncio.ensure_future(self._guard(result))
+
+    async def _guard(self, awaitable):
+        try:
+            await awaitable
+        except Exception as e:
+            print(f"定时任务执行失败: {str(e)}")
+        finally:
+            self.pending -= 1
+
+
+class ParentOrder:
+    """
+    母单
+    :param symbol: 交易对
+    :param side: 方向 ("BUY" 或 "SELL")
+    :param quantity: 总数量
+    :param strategy: 执行策略 ("twap" 均匀分时, "pov" 按成交量比例, "iceberg" 冰山限价单)
+    :param duration: twap 总时长 (秒)
+    :param slices: twap 子单数量
+    :param rate: pov 参与率 (0-1)
+    :param interval: pov 下单间隔 / iceberg 查询间隔 (秒)
+    :param price: iceberg 限价
+    :param display_qty: iceberg 每次显示的数量
+    :param max_duration: pov / iceberg 最长执行时间 (秒)
+    """
+
+    def __init__(self, symbol, side, quantity, strategy='twap', duration=600, slices=10,
+                 rate=0.1, interval=60, price=None, display_qty=None, max_duration=3600):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"不支持的执行策略: {strategy}")
+        if side not in ('BUY', 'SELL'):
+            raise ValueError(f"不支持的订单方向: {side}")
+        if strategy == 'iceberg' and (not price or not display_qty):
+            raise ValueError("冰山订单必须指定价格和显示数量")
+        self.symbol = symbol
+        self.side = side
+        self.quantity = float(quantity)
+        self.strategy = strategy
+        self.duration = duration
+        self.slices = slices
+        self.rate = rate
+        self.interval = interval
+        self.price = price
+        self.display_qty = display_qty
+        self.max_duration = max_duration
+
+        self.plan = []
+        self.remainder = 0.0
+        self.rules = None
+        self.ref_price = None
+        self.filled_qty = 0.0
+        self.cum_quote = 0.0
+        self.children = []
+        self.status = 'NEW'
+        self.started_at = None
+        self.errors = []
+
+    @property
+    def avg_price(self):
+        return self.cum_quote / self.filled_qty if self.filled_qty else 0.0
+
+    @property
+    def remaining(self):
+        return max(0.0, self.quantity - self.filled_qty)
+
+    def progress(self):
+        """进度描述"""
+        pct = self.filled_qty / self.quantity * 100 if self.quantity else 0
+        return (f"[{self.strategy.upper()}] {self.symbol} {self.side} "
+                f"{format_number(self.filled_qty, 4)}/{format_number(self.quantity, 4)} "
+                f"({format_number(pct)}%) 均价: {format_number(self.avg_price, 4)} 子单: {len(self.children)}")
+
+
+class ExecutionScheduler:
+    """
+    拆单执行调度器
+    子单的下单和查询在线程池中执行，调度由时间轮驱动，多个母单共享同一个时间轮。
+    :param client: BinanceClient 或 PaperClient
+    :param trading_utils: TradingUtils 实例
+    :param wheel: TimerWheel 实例
+    :param on_progress: 进度回调，默认打印
+    """
+
+    def __init__(self, client, trading_utils, wheel=None, on_progress=None):
+        self.client = client
+        self.trading_utils = trading_utils
+        self.wheel = wheel or TimerWheel()
+        self.on_progress = on_progress or (lambda parent: print(parent.progress()))
+        self.parents = []
+
+    def prepare(self, parent):
+        """计算子单计划 (不下单)，用于预览和提交前校验"""
+        order_type = 'LIMIT' if parent.strategy == 'iceberg' else 'MARKET'
+        rules = self.trading_utils.get_lot_rules(parent.symbol, order_type)
+        if parent.price:
+            self.trading_utils.check_price_filter(parent.symbol, parent.price)
+        price = parent.price or self.trading_utils.get_mark_price(parent.symbol, ORDER_PRICE_MAX_AGE)
+        if parent.strategy == 'twap':
+            slices = parent.slices
+        elif parent.strategy == 'iceberg':
+            slices = math.ceil(parent.quantity / parent.display_qty)
+        else:
+            slices = 1
+        parent.plan, parent.remainder = split_quantity(parent.quantity, slices, rules, price)
+        parent.rules = rules
+        parent.ref_price = price
+        return parent
+
+    def submit(self, parent):
+        """提交母单，按策略安排第一个子单"""
+        self.prepare(parent)
+        parent.status = 'RUNNING'
+        parent.started_at = time.time()
+        self.parents.append(parent)
+        if parent.strategy == 'twap':
+            interval = parent.duration / max(len(parent.plan), 1)
+            for i in range(len(parent.plan)):
+                self.wheel.schedule(i * interval, self._twap_child, parent, i)
+        elif parent.strategy == 'pov':
+            self.wheel.schedule(0, self._pov_child, parent)
+        else:
+            self.wheel.schedule(0, self._iceberg_child, parent, 0)
+        return parent
+
+    async def run(self):
+        """运行直到所有母单完成"""
+        await self.wheel.run()
+        for parent in self.parents:
+            if parent.status == 'RUNNING':
+                parent.status = 'DONE' if parent.remaining <= parent.remainder + 1e-12 else 'PARTIAL'
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
+
+    def _record_fill(self, parent, order):
+        executed = float(order.get('executedQty') or 0)
+        if executed:
+            avg = float(order.get('avgPrice') or 0) or float(order.get('price') or 0)
+            parent.filled_qty += executed
+            parent.cum_quote += executed * avg
+        self.on_progress(parent)
+
+    def _finish(self, parent, status):
+        parent.status = status
+
+    async def _market_child(self, parent, quantity):
+        try:
+            order = await self._call(self.client.place_order, parent.symbol, parent.side, 'MARKET',
+                                     quantity, resp_type='RESULT')
+            parent.children.append(order)
+            self._record_fill(parent, order)
+        except Exception as e:
+            parent.errors.append(str(e))
+            print(f"子单下单失败 ({parent.symbol}): {str(e)}")
+
+    async def _twap_child(self, parent, index):
+        if parent.status != 'RUNNING':
+            return
+        await self._market_child(parent, parent.plan[index])
+        if index == len(parent.plan) - 1:
+            self._finish(parent, 'DONE' if not parent.errors else 'PARTIAL')
+
+    async def _pov_child(self, parent):
+        if parent.status != 'RUNNING':
+            return
+        if time.time() - parent.started_at > parent.max_duration:
+            self._finish(parent, 'PARTIAL')
+            return
+
+        # 取最近一根已收盘的1分钟K线成交量，按下单间隔折算为区间成交量
+        klines = await self._call(self.client.get_klines, parent.symbol, '1m', 2)
+        volume = float(klines[0][5]) * parent.interval / 60 if klines else 0.0
+        target = min(parent.rate * volume, parent.remaining)
+        rules = parent.rules
+        step = rules['step_size'] or 10 ** -8
+        quantity = round(math.floor(min(target, rules['max_qty']) / step + 1e-9) * step, step_precision(step))
+        min_size = max(rules['min_qty'], rules['min_notional'] / parent.ref_price)
+        # 剩余数量已经低于最小下单量时无法继续
+        if parent.remaining < min_size:
+            self._finish(parent, 'DONE')
+            return
+        if quantity >= min_size:
+            await self._market_child(parent, quantity)
+        if parent.remaining < min_size:
+            self._finish(parent, 'DONE')
+        else:
+            self.wheel.schedule(parent.interval, self._pov_child, parent)
+
+    async def _iceberg_child(self, parent, index, order_id=None):
+        if parent.status != 'RUNNING':
+            return
+        if order_id is None:
+            try:
+                order = await self._call(self.client.place_order, parent.symbol, parent.side, 'LIMIT',
+                                         parent.plan[index], price=parent.price)
+            except Exception as e:
+                parent.errors.append(str(e))
+                self._finish(parent, 'FAILED')
+                return
+            parent.children.append(order)
+            order_id = order['orderId']
+        else:
+            try:
+                order = await self._call(self.client.get_order, parent.symbol, order_id)
+            except Exception as e:
+                # 查询失败 (例如网络抖动) 时下个间隔重试，超过最长执行时间则撤销挂单
+                print(f"查询子单失败 ({parent.symbol}): {str(e)}")
+                if time.time() - parent.started_at > parent.max_duration:
+                    await self._cancel_child(parent, order_id)
+                else:
+                    self.wheel.schedule(parent.interval, self._iceberg_child, parent, index, order_id)
+                return
+
+        if order['status'] == 'FILLED':
+            self._record_fill(parent, order)
+            if index + 1 < len(parent.plan):
+                self.wheel.schedule(0, self._iceberg_child, parent, index + 1)
+            else:
+                self._finish(parent, 'DONE')
+        elif order['status'] in ('CANCELED', 'EXPIRED', 'REJECTED'):
+            self._record_fill(parent, order)
+            self._finish(parent, 'PARTIAL')
+        elif time.time() - parent.started_at > parent.max_duration:
+            await self._cancel_child(parent, order_id)
+        else:
+            self.wheel.schedule(parent.interval, self._iceberg_child, parent, index, order_id)
+
+    async def _cancel_child(self, parent, order_id):
+        """撤销挂单中的子单并结束母单"""
+        try:
+            order = await self._call(self.client.cancel_order, parent.symbol, order_id)
+            self._record_fill(parent, order)
+        except Exception as e:
+            parent.errors.append(f"撤销子单 {order_id} 失败: {str(e)}")
+            print(f"撤销子单失败 ({parent.symbol}): {str(e)}")
+        self._finish(parent, 'PARTIAL')
+
+
+def run_parent_orders(client, trading_utils, parents, tick=0.1):
+    """
+    执行一组母单并等待全部完成
+    :return: 母单列表
+    """
+    scheduler = ExecutionScheduler(client, trading_utils, TimerWheel(tick=tick))
+    for parent in parents:
+        scheduler.submit(parent)
+    asyncio.run(scheduler.run())
+    for parent in parents:
+        print(f"母单结束 [{parent.status}] {parent.progress()}")
+        if parent.remainder:
+            print(f"  零头 {parent.remainder} 小于下单步长，未执行")
+        for error in parent.errors:
+            print(f"  错误: {error}")
+    return parents
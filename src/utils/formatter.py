@@ -17,6 +17,25 @@ def format_position_info(position, mark_price):
     :param mark_price: 标记价格
     :return: 格式化后的持仓信息列表
     """
+    record = position_record(position, mark_price)
+    return [
+        record['symbol'],
+        record['side'],
+        format_number(record['quantity'], 4),
+        format_number(record['entry_price'], 4),
+        format_number(record['mark_price'], 4),
+        f"{record['leverage']}x",
+        format_number(record['unrealized_profit']),
+        f"{format_number(record['roi'])}%"
+    ]
+
+def position_record(position, mark_price):
+    """
+    持仓信息的原始数值记录 (用于排序和 NDJSON / CSV 输出)
+    :param position: 持仓信息字典
+    :param mark_price: 标记价格
+    :return: 字典，字段与 format_position_info 的各列对应
+    """
     position_amt = float(position['positionAmt'])
     entry_price = float(position['entryPrice'])
     unrealized_profit = float(position['unrealizedProfit'])
@@ -28,13 +47,15 @@ def format_position_info(position, mark_price):
     else:
         roi = 0
     
-    return [
-        position['symbol'],
-        "多" if position_amt > 0 else "空",
-        format_number(abs(position_amt), 4),
-        format_number(entry_price, 4),
-        format_number(mark_price, 4),
-        f"{leverage}x",
-        format_number(unrealized_profit),
-        f"{format_number(roi)}%"
-    ] 
\ No newline at end of file
+    return {
+        'symbol': position['symbol'],
+        'side': "多" if position_amt > 0 else "空",
+        'position_side': 'LONG' if position_amt > 0 else 'SHORT',
+        'position_amt': position_amt,
+        'quantity': abs(position_amt),
+        'entry_price': entry_price,
+        'mark_price': mark_price,
+        'leverage': leverage,
+        'unrealized_profit': unrealized_profit,
+        'roi': roi
+    }
@@ -0,0 +1,316 @@
+import time
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_HISTORY_DB = 'history.db'
+
+PAGE_LIMIT = 1000
+WEIGHT_USER_TRADES = 5
+WEIGHT_INCOME = 30
+# 币安合约接口每分钟权重上限为2400，保留余量给其它进程
+DEFAULT_WEIGHT_BUDGET = 1800
+
+DAY_MS = 24 * 60 * 60 * 1000
+TRADE_WINDOW_MS = 7 * DAY_MS
+INCOME_WINDOW_MS = 30 * DAY_MS
+# 资金流水可能延迟发布，游标最多推进到当前时间之前的这段时间，重叠部分由主键去重
+INCOME_LAG_MS = 10 * 60 * 1000
+
+# 计入盈亏的资金流水类型 (划转等非交易流水不计入)
+PNL_INCOME_TYPES = ('REALIZED_PNL', 'COMMISSION', 'FUNDING_FEE')
+PNL_TYPES_SQL = ', '.join(f"'{t}'" for t in PNL_INCOME_TYPES)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    symbol TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    order_id INTEGER,
+    side TEXT,
+    price REAL,
+    qty REAL,
+    quote_qty REAL,
+    realized_pnl REAL,
+    commission REAL,
+    commission_asset TEXT,
+    maker INTEGER,
+    time INTEGER NOT NULL,
+    PRIMARY KEY (symbol, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_trades_time ON trades (time);
+
+CREATE TABLE IF NOT EXISTS income (
+    tran_id INTEGER NOT NULL,
+    income_type TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    income REAL,
+    asset TEXT,
+    info TEXT,
+    trade_id TEXT,
+    time INTEGER NOT NULL,
+    PRIMARY KEY (tran_id, income_type, symbol)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_income_symbol_time ON income (symbol, time);
+CREATE INDEX IF NOT EXISTS idx_income_time ON income (time);
+
+CREATE TABLE IF NOT EXISTS cursors (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class WeightLimiter:
+    """
+    请求权重限制器 (1分钟滑动窗口，线程安全)
+    :param budget: 每分钟可使用的权重
+    """
+
+    def __init__(self, budget=DEFAULT_WEIGHT_BUDGET):
+        self.budget = budget
+        self._window = deque()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, weight):
+        """占用权重，超出预算时等待窗口滑动"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._window and now - self._window[0][0] >= 60:
+                    self._used -= self._window.popleft()[1]
+                if self._used + weight <= self.budget:
+                    self._window.append((now, weight))
+                    self._used += weight
+                    return
+                wait = 60 - (now - self._window[0][0])
+            time.sleep(max(wait, 0.05))
+
+    def observe(self, used_weight):
+        """根据服务器报告的已用权重校正 (其它进程也在使用同一账户权重)"""
+        if used_weight is None:
+            return
+        with self._lock:
+            extra = used_weight - self._used
+            if extra > 0:
+                self._window.append((time.monotonic(), extra))
+                self._used += extra
+
+
+class HistoryStore:
+    """成交和资金流水的本地 SQLite 存储"""
+
+    def __init__(self, path=DEFAULT_HISTORY_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def get_cursor(self, name):
+        row = self.conn.execute("SELECT value FROM cursors WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_cursor(self, name, value):
+        self.conn.execute(
+            "INSERT INTO cursors (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (name, value)
+        )
+
+    def cursor_symbols(self):
+        rows = self.conn.execute("SELECT name FROM cursors WHERE name LIKE 'trades:%'").fetchall()
+        return {name.split(':', 1)[1] for (name,) in rows}
+
+    def income_symbols(self):
+        rows = self.conn.execute("SELECT DISTINCT symbol FROM income WHERE symbol != ''").fetchall()
+        return {symbol for (symbol,) in rows}
+
+    def add_trades(self, trades):
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (t['symbol'], t['id'], t.get('orderId'), t.get('side'),
+                 float(t['price']), float(t['qty']), float(t.get('quoteQty', 0)),
+                 float(t.get('realizedPnl', 0)), float(t.get('commission', 0)),
+                 t.get('commissionAsset'), 1 if t.get('maker') else 0, t['time'])
+                for t in trades
+            ]
+        )
+
+    def add_income(self, records):
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO income VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (r['tranId'], r['incomeType'], r.get('symbol') or '', float(r['income']),
+                 r.get('asset'), r.get('info'), str(r.get('tradeId') or ''), r['time'])
+                for r in records
+            ]
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def pnl_by_symbol(self, start_time=None):
+        """按交易对汇总盈亏"""
+        return self.conn.execute(
+            """
+            SELECT i.symbol,
+                   SUM(CASE WHEN i.income_type = 'REALIZED_PNL' THEN i.income ELSE 0 END),
+                   SUM(CASE WHEN i.income_type = 'COMMISSION' THEN i.income ELSE 0 END),
+                   SUM(CASE WHEN i.income_type = 'FUNDING_FEE' THEN i.income ELSE 0 END),
+                   SUM(i.income),
+                   (SELECT COUNT(*) FROM trades t WHERE t.symbol = i.symbol AND t.time >= :start),
+                   (SELECT SUM(t.quote_qty) FROM trades t WHERE t.symbol = i.symbol AND t.time >= :start)
+            FROM income i
+            WHERE i.symbol != '' AND i.time >= :start AND i.income_type IN ({types})
+            GROUP BY i.symbol
+            ORDER BY SUM(i.income) DESC
+            """.format(types=PNL_TYPES_SQL),
+            {'start': start_time or 0}
+        ).fetchall()
+
+    def pnl_by_day(self, start_time=None):
+        """按日期 (UTC) 汇总盈亏"""
+        return self.conn.execute(
+            """
+            SELECT date(time / 1000, 'unixepoch') AS day,
+                   SUM(CASE WHEN income_type = 'REALIZED_PNL' THEN income ELSE 0 END),
+                   SUM(CASE WHEN income_type = 'COMMISSION' THEN income ELSE 0 END),
+                   SUM(CASE WHEN income_type = 'FUNDING_FEE' THEN income ELSE 0 END),
+                   SUM(income)
+            FROM income
+            WHERE time >= ? AND income_type IN ({types})
+            GROUP BY day
+            ORDER BY day
+            """.format(types=PNL_TYPES_SQL),
+            (start_time or 0,)
+        ).fetchall()
+
+
+class HistorySync:
+    """
+    增量同步成交和资金流水
+    资金流水按时间游标分页；成交按交易对分别记录最后成交ID，多个交易对并发拉取，
+    所有请求共享同一个权重限制器。
+    :param client: BinanceClient 实例
+    :param store: HistoryStore 实例
+    :param days: 首次同步时回溯的天数
+    :param workers: 并发线程数
+    """
+
+    def __init__(self, client, store, days=90, workers=4, limiter=None):
+        self.client = client
+        self.store = store
+        self.days = days
+        self.workers = workers
+        self.limiter = limiter or WeightLimiter()
+
+    def _request(self, weight, func, *args, **kwargs):
+        self.limiter.acquire(weight)
+        result = func(*args, **kwargs)
+        self.limiter.observe(getattr(self.client, 'used_weight', None))
+        return result
+
+    def _windows(self, start, end, size):
+        while start < end:
+            yield start, min(start + size - 1, end)
+            start += size
+
+    def sync_income(self):
+        """同步资金流水，返回新增记录数"""
+        now = int(time.time() * 1000)
+        start = self.store.get_cursor('income')
+        if start is None:
+            start = now - self.days * DAY_MS
+        total = 0
+        for window_start, window_end in self._windows(start, now, INCOME_WINDOW_MS):
+            page_start = window_start
+            while True:
+                page = self._request(WEIGHT_INCOME, self.client.get_income,
+                                     start_time=page_start, end_time=window_end, limit=PAGE_LIMIT)
+                self.store.add_income(page)
+                total += len(page)
+                if len(page) < PAGE_LIMIT:
+                    break
+                # 同一毫秒的记录可能跨页，从最后一条的时间重新开始，重复记录由主键去重
+                page_start = page[-1]['time']
+            self.store.set_cursor('income', max(window_start, min(window_end + 1, now - INCOME_LAG_MS)))
+            self.store.commit()
+        return total
+
+    def _fetch_symbol_trades(self, symbol, last_id, scanned_until):
+        """拉取单个交易对的新成交 (在线程池中运行，不访问数据库)"""
+        trades = []
+        if last_id is None:
+            # 首次同步: 按7天窗口找到第一笔成交，之后改用成交ID翻页
+            now = int(time.time() * 1000)
+            start = scanned_until if scanned_until is not None else now - self.days * DAY_MS
+            for window_start, window_end in self._windows(start, now, TRADE_WINDOW_MS):
+                page = self._request(WEIGHT_USER_TRADES, self.client.get_user_trades, symbol,
+                                     start_time=window_start, end_time=window_end, limit=PAGE_LIMIT)
+                if page:
+                    trades.extend(page)
+                    last_id = max(t['id'] for t in page)
+                    if len(page) < PAGE_LIMIT and window_end >= now:
+                        return trades, last_id, now
+                    break
+            if last_id is None:
+                return trades, None, now
+
+        while True:
+            page = self._request(WEIGHT_USER_TRADES, self.client.get_user_trades, symbol,
+                                 from_id=last_id + 1, limit=PAGE_LIMIT)
+            trades.extend(page)
+            if page:
+                last_id = max(t['id'] for t in page)
+            if len(page) < PAGE_LIMIT:
+                return trades, last_id, None
+
+    def sync_trades(self, symbols):
+        """并发同步多个交易对的成交，返回 {交易对: 新增成交数}"""
+        result = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(
+                    self._fetch_symbol_trades, symbol,
+                    self.store.get_cursor(f'trades:{symbol}'),
+                    self.store.get_cursor(f'trades_scan:{symbol}')
+                ): symbol
+                for symbol in symbols
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    trades, last_id, scanned_until = future.result()
+                except Exception as e:
+                    print(f"同步 {symbol} 成交失败: {str(e)}")
+                    continue
+                self.store.add_trades(trades)
+                if last_id is not None:
+                    self.store.set_cursor(f'trades:{symbol}', last_id)
+                elif scanned_until is not None:
+                    self.store.set_cursor(f'trades_scan:{symbol}', scanned_until)
+                self.store.commit()
+                result[symbol] = len(trades)
+        return result
+
+    def run(self, symbols=None):
+        """
+        执行一次完整同步
+        :param symbols: 额外需要同步成交的交易对
+        """
+        income_count = self.sync_income()
+        print(f"资金流水: 新增 {income_count} 条")
+
+        traded = set(symbols or [])
+        traded |= self.store.income_symbols()
+        traded |= self.store.cursor_symbols()
+        account = self._request(5, self.client.get_futures_account)
+        traded |= {p['symbol'] for p in account['positions'] if float(p['positionAmt']) != 0}
+
+        trade_counts = self.sync_trades(sorted(traded))
+        print(f"成交记录: {len(trade_counts)} 个交易对，新增 {sum(trade_counts.values())} 条")
+        return income_count, trade_counts
@@ -0,0 +1,99 @@
+import time
+import threading
+
+
+class Prefetcher:
+    """
+    后台预取缓存
+    每个缓存项注册一个加载函数和刷新周期，后台线程按周期刷新；
+    读取时缓存足够新则直接返回，否则在当前线程同步加载。
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, key, loader, ttl):
+        """
+        注册缓存项
+        :param key: 缓存键
+        :param loader: 无参数的加载函数
+        :param ttl: 刷新周期 (秒)
+        """
+        with self._lock:
+            self._entries[key] = {
+                'loader': loader,
+                'ttl': ttl,
+                'value': None,
+                'fetched_at': None,
+                'loading': threading.Lock()
+            }
+        self._wake.set()
+
+    def start(self):
+        """启动后台刷新线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='prefetcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _load(self, key, entry, max_age):
+        # 同一缓存项同时只加载一次，等待中的读取方直接使用刚加载的结果
+        with entry['loading']:
+            fetched_at = entry['fetched_at']
+            if fetched_at is not None and time.time() - fetched_at < max_age:
+                return entry['value']
+            value = entry['loader']()
+            entry['value'] = value
+            entry['fetched_at'] = time.time()
+            return value
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            now = time.time()
+            next_due = now + 60
+            for key, entry in list(self._entries.items()):
+                fetched_at = entry['fetched_at']
+                due = now if fetched_at is None else fetched_at + entry['ttl']
+                if due <= now:
+                    try:
+                        self._load(key, entry, entry['ttl'])
+                    except Exception:
+                        # 后台刷新失败不影响前台，下次读取时同步重试
+                        pass
+                    due = time.time() + entry['ttl']
+                next_due = min(next_due, due)
+            self._wake.wait(max(0.05, next_due - time.time()))
+
+    def get(self, key, max_age=None):
+        """
+        读取缓存项
+        :param max_age: 允许的最大缓存时间 (秒)，默认使用注册时的刷新周期
+        """
+        entry = self._entries[key]
+        fetched_at = entry['fetched_at']
+        limit = entry['ttl'] if max_age is None else max_age
+        if fetched_at is not None and time.time() - fetched_at <= limit:
+            return entry['value']
+        return self._load(key, entry, limit)
+
+    def peek(self, key):
+        """读取缓存值，不触发加载 (没有缓存时返回 None)"""
+        entry = self._entries.get(key)
+        return entry['value'] if entry else None
+
+    def invalidate(self, *keys):
+        """使缓存项失效，后台线程会立即重新加载"""
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['fetched_at'] = None
+        self._wake.set()
@@ -0,0 +1,241 @@
+"""
+共享内存价格板
+
+由单个行情进程 (python main.py board) 拉取标记价格并写入固定布局的共享内存，
+同一主机上的其它进程直接从共享内存读取，无需各自请求接口。
+
+内存布局 (小端):
+    头部 64 字节: magic(4s) version(H) 保留(H) capacity(I) count(I) updated_ms(q) 保留
+    每个槽位 64 字节: seq(Q) symbol(24s) mark_price(d) index_price(d) funding_rate(d) update_ms(q)
+
+每个槽位使用 seqlock 保护: 写入前 seq 加一变为奇数，写完再加一变为偶数；
+读取方在 seq 为偶数且前后一致时才接受读到的数据。
+"""
+import sys
+import time
+import struct
+from multiprocessing import shared_memory
+
+MAGIC = b'CAPB'
+VERSION = 1
+DEFAULT_CAPACITY = 1024
+DEFAULT_MAX_AGE = 5.0
+
+HEADER_FORMAT = '<4sHHIIq'
+HEADER_SIZE = 64
+SLOT_SIZE = 64
+SEQ_FORMAT = '<Q'
+SYMBOL_FORMAT = '<24s'
+DATA_FORMAT = '<dddq'
+SYMBOL_OFFSET = 8
+DATA_OFFSET = 32
+
+_COUNT_OFFSET = struct.calcsize('<4sHHI')
+_UPDATED_OFFSET = struct.calcsize('<4sHHII')
+
+
+def board_name(testnet=False):
+    """返回对应环境的共享内存名称"""
+    return 'cryptoassistant_testnet' if testnet else 'cryptoassistant_mainnet'
+
+
+def _attach_shm(name):
+    """以只读用途附加到已存在的共享内存，避免退出时被资源追踪器删除"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+class PriceBoard:
+    """共享内存价格板，写入方使用 create，读取方使用 attach"""
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.buf = shm.buf
+        self.owner = owner
+        magic, version, _, capacity, _, _ = struct.unpack_from(HEADER_FORMAT, self.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"共享内存 {shm.name} 不是有效的价格板")
+        self.capacity = capacity
+        self._index = {}
+        self._known = 0
+
+    @classmethod
+    def create(cls, name, capacity=DEFAULT_CAPACITY, stale_after=DEFAULT_MAX_AGE):
+        """
+        创建价格板 (由行情进程调用)
+        :param stale_after: 已存在的价格板超过该时间 (秒) 未更新才视为残留，否则拒绝启动
+        """
+        size = HEADER_SIZE + SLOT_SIZE * capacity
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            existing = cls.attach(name)
+            if existing is not None:
+                last_update = existing.last_update()
+                existing.close()
+                if time.time() * 1000 - last_update < stale_after * 1000:
+                    raise ValueError(f"价格板 {name} 正在被其它行情进程更新，请勿重复启动")
+            # 上次异常退出残留的共享内存，直接复用并重新初始化
+            shm = shared_memory.SharedMemory(name=name)
+            if shm.size < size:
+                shm.close()
+                shm.unlink()
+                shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        struct.pack_into(HEADER_FORMAT, shm.buf, 0, MAGIC, VERSION, 0, capacity, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """附加到已存在的价格板，不存在时返回 None"""
+        try:
+            shm = _attach_shm(name)
+        except (FileNotFoundError, OSError):
+            return None
+        try:
+            return cls(shm)
+        except (ValueError, struct.error):
+            shm.close()
+            return None
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # ---- 写入 ----
+
+    def _slot_offset(self, slot):
+        return HEADER_SIZE + slot * SLOT_SIZE
+
+    def _allocate(self, symbol):
+        slot = self._known
+        if slot >= self.capacity:
+            raise ValueError(f"价格板已满 (容量 {self.capacity})")
+        offset = self._slot_offset(slot)
+        struct.pack_into(SYMBOL_FORMAT, self.buf, offset + SYMBOL_OFFSET, symbol.encode('ascii'))
+        self._index[symbol] = slot
+        self._known += 1
+        struct.pack_into('<I', self.buf, _COUNT_OFFSET, self._known)
+        return slot
+
+    def publish(self, symbol, mark_price, index_price=0.0, funding_rate=0.0, update_ms=None):
+        """写入单个交易对的价格"""
+        slot = self._index.get(symbol)
+        if slot is None:
+            slot = self._allocate(symbol)
+        offset = self._slot_offset(slot)
+        buf = self.buf
+        seq = struct.unpack_from(SEQ_FORMAT, buf, offset)[0]
+        struct.pack_into(SEQ_FORMAT, buf, offset, seq + 1)
+        struct.pack_into(DATA_FORMAT, buf, offset + DATA_OFFSET,
+                         mark_price, index_price, funding_rate,
+                         update_ms if update_ms is not None else int(time.time() * 1000))
+        struct.pack_into(SEQ_FORMAT, buf, offset, seq + 2)
+
+    def publish_mark_prices(self, mark_prices):
+        """
+        写入 premiumIndex 接口返回的全部标记价格
+        :param mark_prices: get_all_mark_prices 的返回值
+        """
+        now = int(time.time() * 1000)
+        for item in mark_prices:
+            self.publish(
+                item['symbol'],
+                float(item['markPrice']),
+                float(item.get('indexPrice') or 0),
+                float(item.get('lastFundingRate') or 0),
+                now
+            )
+        struct.pack_into('<q', self.buf, _UPDATED_OFFSET, now)
+
+    # ---- 读取 ----
+
+    def _slot_symbol(self, slot):
+        raw = struct.unpack_from(SYMBOL_FORMAT, self.buf, self._slot_offset(slot) + SYMBOL_OFFSET)[0]
+        return raw.rstrip(b'\x00').decode('ascii')
+
+    def _lookup(self, symbol):
+        slot = self._index.get(symbol)
+        if slot is None:
+            self._refresh_index()
+            slot = self._index.get(symbol)
+        return slot
+
+    def _refresh_index(self):
+        count = struct.unpack_from('<I', self.buf, _COUNT_OFFSET)[0]
+        for slot in range(self._known, min(count, self.capacity)):
+            self._index[self._slot_symbol(slot)] = slot
+        self._known = max(self._known, count)
+
+    def read(self, symbol, retries=100):
+        """
+        读取单个交易对的价格
+        :return: (mark_price, index_price, funding_rate, update_ms)，不存在时返回 None
+        """
+        slot = self._lookup(symbol)
+        if slot is None:
+            return None
+        if self._slot_symbol(slot) != symbol:
+            # 价格板被重新初始化，槽位分配已变化，重建索引
+            self._index = {}
+            self._known = 0
+            slot = self._lookup(symbol)
+            if slot is None or self._slot_symbol(slot) != symbol:
+                return None
+
+        offset = self._slot_offset(slot)
+        buf = self.buf
+        for _ in range(retries):
+            seq1 = struct.unpack_from(SEQ_FORMAT, buf, offset)[0]
+            if seq1 & 1:
+                continue
+            data = struct.unpack_from(DATA_FORMAT, buf, offset + DATA_OFFSET)
+            if struct.unpack_from(SEQ_FORMAT, buf, offset)[0] == seq1:
+                return data if seq1 else None
+        return None
+
+    def get_mark_price(self, symbol, max_age=DEFAULT_MAX_AGE):
+        """读取标记价格，数据过期或不存在时返回 None"""
+        data = self.read(symbol)
+        if data is None:
+            return None
+        if max_age is not None and time.time() * 1000 - data[3] > max_age * 1000:
+            return None
+        return data[0]
+
+    def last_update(self):
+        """返回行情进程最近一次写入的时间 (毫秒)"""
+        return struct.unpack_from('<q', self.buf, _UPDATED_OFFSET)[0]
+
+
+def run_price_board(client, interval=1.0, capacity=DEFAULT_CAPACITY):
+    """
+    运行行情进程: 定时拉取全部标记价格并写入共享内存
+    :param client: BinanceClient 实例
+    :param interval: 刷新间隔 (秒)
+    :param capacity: 价格板容量 (交易对数量)
+    """
+    name = board_name(client.testnet)
+    board = PriceBoard.create(name, capacity, stale_after=max(DEFAULT_MAX_AGE, interval * 2))
+    print(f"价格板已启动: {name} (容量 {capacity})，按 Ctrl+C 退出")
+    try:
+        while True:
+            started = time.time()
+            try:
+                board.publish_mark_prices(client.get_all_mark_prices())
+            except Exception as e:
+                print(f"更新价格失败: {str(e)}")
+            time.sleep(max(0.0, interval - (time.time() - started)))
+    except KeyboardInterrupt:
+        print("\n价格板已停止")
+    finally:
+        board.close()
@@ -0,0 +1,186 @@
+import json
+import numpy as np
+from tabulate import tabulate
+from src.utils.formatter import format_number
+from src.utils.execution import split_quantity, step_precision
+
+
+def load_targets(path):
+    """
+    读取目标仓位文件
+    格式: {"BTCUSDT": {"weight": 0.4}, "ETHUSDT": {"notional": -2000}, "SOLUSDT": 0.1}
+    直接写数字时视为权重；负数表示做空
+    :return: {交易对: ('weight' 或 'notional', 数值)}
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+    except json.JSONDecodeError:
+        raise ValueError(f"目标文件 {path} 格式不正确，请确保是有效的JSON格式")
+
+    targets = {}
+    for symbol, value in raw.items():
+        if isinstance(value, dict):
+            if 'notional' in value:
+                targets[symbol.upper()] = ('notional', float(value['notional']))
+            elif 'weight' in value:
+                targets[symbol.upper()] = ('weight', float(value['weight']))
+            else:
+                raise ValueError(f"{symbol} 需要指定 weight 或 notional")
+        else:
+            targets[symbol.upper()] = ('weight', float(value))
+    return targets
+
+
+class BasketRebalancer:
+    """
+    组合调仓
+    一次获取账户、全部标记价格和交易规则，之后所有交易对的目标数量、步长取整、
+    最小数量和最小名义价值检查都用 NumPy 数组一次完成，不逐笔请求接口。
+    :param client: BinanceClient / PaperClient
+    :param trading_utils: TradingUtils 实例，市价单数量规则与拆单执行共用 get_lot_rules
+    """
+
+    def __init__(self, client, trading_utils):
+        self.client = client
+        self.trading_utils = trading_utils
+
+    def _market_rules(self, symbol):
+        if self.trading_utils.get_symbol_filters(symbol) is None:
+            return None
+        rules = self.trading_utils.get_lot_rules(symbol, 'MARKET')
+        return rules['step_size'], rules['min_qty'], rules['max_qty'], rules['min_notional']
+
+    def plan(self, targets, account=None, prices=None, gross=1.0, close_others=False):
+        """
+        计算调仓订单
+        :param targets: load_targets 的返回值
+        :param account: 账户信息，默认请求接口
+        :param prices: {交易对: 标记价格}，默认请求接口
+        :param gross: 权重对应的总敞口倍数 (相对账户权益)
+        :param close_others: 是否平掉不在目标中的持仓
+        :return: 每个交易对一条的调仓记录列表
+        """
+        if account is None:
+            account = self.client.get_futures_account()
+        if prices is None:
+            prices = {p['symbol']: float(p['markPrice']) for p in self.client.get_all_mark_prices()}
+
+        equity = float(account['totalWalletBalance']) + float(account['totalUnrealizedProfit'])
+        current = {p['symbol']: float(p['positionAmt']) for p in account['positions']
+                   if float(p['positionAmt']) != 0}
+
+        symbols = set(targets)
+        if close_others:
+            symbols |= set(current)
+        symbols = sorted(symbols)
+        n = len(symbols)
+
+        price = np.array([prices.get(s, np.nan) for s in symbols], dtype=float)
+        current_qty = np.array([current.get(s, 0.0) for s in symbols], dtype=float)
+        target_notional = np.zeros(n)
+        for i, s in enumerate(symbols):
+            kind, value = targets.get(s, ('notional', 0.0))
+            target_notional[i] = value * equity * gross if kind == 'weight' else value
+
+        rules = [self._market_rules(s) for s in symbols]
+        known = np.array([r is not None for r in rules])
+        rule_array = np.array([r or (0.0, 0.0, np.inf, 0.0) for r in rules], dtype=float).reshape(n, 4)
+        step, min_qty, max_qty, min_notional = rule_array.T
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            target_qty = np.where(price > 0, target_notional / price, np.nan)
+            delta = target_qty - current_qty
+            abs_delta = np.abs(delta)
+            units = np.where(step > 0, np.floor(abs_delta / np.where(step > 0, step, 1) + 1e-9), abs_delta)
+            qty = np.where(step > 0, units * step, abs_delta)
+
+        # 目标为零时按持仓数量完整平仓，只减仓订单不受最小名义价值限制
+        closing = (target_notional == 0) & (current_qty != 0)
+        qty = np.where(closing, np.abs(current_qty), qty)
+        reduce_only = (np.sign(delta) == -np.sign(current_qty)) & (qty <= np.abs(current_qty) + 1e-12)
+        notional = qty * price
+
+        status = np.full(n, 'ok', dtype=object)
+        status[qty * 1.0 < min_qty] = 'below_min_qty'
+        status[(notional < min_notional) & ~reduce_only] = 'below_min_notional'
+        status[qty == 0] = 'no_change'
+        status[qty > max_qty] = 'split'
+        status[~known] = 'unknown_symbol'
+        status[np.isnan(price)] = 'no_price'
+
+        legs = []
+        for i, symbol in enumerate(symbols):
+            prec = step_precision(step[i]) if step[i] > 0 else 8
+            legs.append({
+                'symbol': symbol,
+                'price': float(price[i]),
+                'current_qty': float(current_qty[i]),
+                'target_qty': float(target_qty[i]),
+                'side': 'BUY' if delta[i] > 0 else 'SELL',
+                'quantity': round(float(qty[i]), prec) if np.isfinite(qty[i]) else 0.0,
+                'notional': float(notional[i]) if np.isfinite(notional[i]) else 0.0,
+                'reduce_only': bool(reduce_only[i]),
+                'status': status[i],
+                'rules': {
+                    'step_size': float(step[i]), 'min_qty': float(min_qty[i]),
+                    'max_qty': float(max_qty[i]), 'min_notional': float(min_notional[i])
+                }
+            })
+        return legs
+
+    def execute(self, legs):
+        """
+        提交可执行的调仓订单，超过单笔最大数量的订单拆分为多笔市价单
+        只减仓订单先提交，释放保证金后再开仓或加仓
+        """
+        results = []
+        for leg in sorted(legs, key=lambda leg: not leg['reduce_only']):
+            if leg['status'] not in ('ok', 'split'):
+                continue
+            if leg['status'] == 'split':
+                quantities, _ = split_quantity(leg['quantity'], 1, leg['rules'], leg['price'])
+            else:
+                quantities = [leg['quantity']]
+            for quantity in quantities:
+                try:
+                    order = self.client.place_order(leg['symbol'], leg['side'], 'MARKET', quantity,
+                                                    reduce_only=leg['reduce_only'])
+                    results.append((leg['symbol'], quantity, order.get('status'), None))
+                except Exception as e:
+                    results.append((leg['symbol'], quantity, 'FAILED', str(e)))
+        return results
+
+
+STATUS_TEXT = {
+    'ok': '执行',
+    'split': '拆单执行',
+    'no_change': '无需调整',
+    'below_min_qty': '低于最小数量',
+    'below_min_notional': '低于最小名义价值',
+    'unknown_symbol': '未知交易对',
+    'no_price': '无价格'
+}
+
+
+def format_rebalance_plan(legs):
+    """格式化调仓预览表"""
+    rows = []
+    total = 0.0
+    for leg in legs:
+        actionable = leg['status'] in ('ok', 'split')
+        if actionable:
+            total += leg['notional']
+        rows.append([
+            leg['symbol'],
+            format_number(leg['current_qty'], 4),
+            format_number(leg['target_qty'], 4) if np.isfinite(leg['target_qty']) else '-',
+            ('买入' if leg['side'] == 'BUY' else '卖出') if actionable else '-',
+            format_number(leg['quantity'], 4) if actionable else '-',
+            format_number(leg['notional']) if actionable else '-',
+            '是' if leg['reduce_only'] and actionable else '',
+            STATUS_TEXT.get(leg['status'], leg['status'])
+        ])
+    headers = ["交易对", "当前数量", "目标数量", "方向", "下单数量", "名义价值", "只减仓", "状态"]
+    table = tabulate(rows, headers=headers, tablefmt="grid", disable_numparse=True)
+    return f"{table}\n调仓订单总名义价值: {format_number(total)} USDT"
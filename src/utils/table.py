@@ -0,0 +1,165 @@
+import sys
+import csv
+import json
+import unicodedata
+from src.utils.formatter import format_number
+
+FORMATS = ('table', 'ndjson', 'csv')
+
+
+class Column:
+    """
+    表格列
+    :param key: 记录中的字段名 (也是 NDJSON / CSV 的字段名)
+    :param title: 表头
+    :param decimals: 小数位数，None 表示文本列
+    :param suffix: 数值后缀，例如 "%" 或 "x"
+    """
+
+    __slots__ = ('key', 'title', 'decimals', 'suffix')
+
+    def __init__(self, key, title, decimals=None, suffix=''):
+        self.key = key
+        self.title = title
+        self.decimals = decimals
+        self.suffix = suffix
+
+    @property
+    def numeric(self):
+        return self.decimals is not None
+
+    def format(self, value):
+        if value is None:
+            return '-'
+        if self.decimals is None:
+            return str(value)
+        return format_number(value, self.decimals) + self.suffix
+
+
+def display_width(text):
+    """终端显示宽度，中文等全角字符占两列"""
+    if text.isascii():
+        return len(text)
+    return sum(2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1 for ch in text)
+
+
+class Table:
+    """
+    大表格渲染
+    数据按列保存原始数值，排序和截取只操作行号；
+    数值列的宽度由列内最大、最小值直接算出，不需要先把所有单元格格式化一遍，
+    之后逐行格式化并写出，不在内存中拼接整张表。
+    :param columns: Column 列表
+    :param records: 字典列表，值为原始数值或文本
+    """
+
+    def __init__(self, columns, records):
+        self.columns = columns
+        self.data = {c.key: [r.get(c.key) for r in records] for c in columns}
+        self.order = list(range(len(records)))
+        self.total = len(records)
+        self.note = None
+
+    def sort(self, key, reverse=False):
+        """按列排序，空值始终排在最后"""
+        if key not in self.data:
+            raise ValueError(f"不支持的排序字段: {key}，可选: {', '.join(self.data)}")
+        values = self.data[key]
+        present = [i for i in self.order if values[i] is not None]
+        missing = [i for i in self.order if values[i] is None]
+        present.sort(key=values.__getitem__, reverse=reverse)
+        self.order = present + missing
+        return self
+
+    def top(self, n):
+        """只保留前 n 行"""
+        if n is not None and n < len(self.order):
+            self.note = f"仅显示前 {n} 行，共 {self.total} 行"
+            self.order = self.order[:n]
+        return self
+
+    def page(self, page_size, page=1):
+        """分页，page 从 1 开始"""
+        if not page_size:
+            return self
+        pages = max(1, -(-len(self.order) // page_size))
+        page = min(max(page, 1), pages)
+        start = (page - 1) * page_size
+        self.order = self.order[start:start + page_size]
+        self.note = f"第 {page}/{pages} 页，每页 {page_size} 行，共 {self.total} 行"
+        return self
+
+    def _width(self, column):
+        values = self.data[column.key]
+        cells = [values[i] for i in self.order]
+        width = display_width(column.title)
+        if column.numeric:
+            numbers = [v for v in cells if v is not None]
+            if numbers:
+                # 千位分隔后最长的一定是绝对值最大的数 (负数多一个符号)
+                width = max(width, len(column.format(max(numbers))), len(column.format(min(numbers))))
+            if len(numbers) != len(cells):
+                width = max(width, 1)
+        elif cells:
+            width = max(width, max(display_width(column.format(v)) for v in cells))
+        return width
+
+    def render(self, out=None, fmt='table'):
+        """
+        输出表格
+        :param fmt: "table" 文本表格, "ndjson" 每行一个 JSON 对象, "csv"
+        """
+        out = out or sys.stdout
+        if fmt == 'ndjson':
+            self._render_ndjson(out)
+        elif fmt == 'csv':
+            self._render_csv(out)
+        elif fmt == 'table':
+            self._render_table(out)
+        else:
+            raise ValueError(f"不支持的输出格式: {fmt}")
+
+    def _render_table(self, out):
+        columns = self.columns
+        widths = [self._width(c) for c in columns]
+        border = '+' + '+'.join('-' * (w + 2) for w in widths) + '+\n'
+        write = out.write
+
+        def pad(text, width, right):
+            gap = ' ' * (width - display_width(text))
+            return gap + text if right else text + gap
+
+        write(border)
+        write('| ' + ' | '.join(pad(c.title, w, False) for c, w in zip(columns, widths)) + ' |\n')
+        write('+' + '+'.join('=' * (w + 2) for w in widths) + '+\n')
+        cells = [(self.data[c.key], c.format, w, c.numeric) for c, w in zip(columns, widths)]
+        for i in self.order:
+            write('| ' + ' | '.join(pad(fmt(values[i]), w, right) for values, fmt, w, right in cells) + ' |\n')
+        write(border)
+        if self.note:
+            write(self.note + '\n')
+
+    def _render_ndjson(self, out):
+        keys = [c.key for c in self.columns]
+        columns = [self.data[k] for k in keys]
+        for i in self.order:
+            out.write(json.dumps(dict(zip(keys, [values[i] for values in columns])), ensure_ascii=False) + '\n')
+
+    def _render_csv(self, out):
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow([c.key for c in self.columns])
+        columns = [self.data[c.key] for c in self.columns]
+        for i in self.order:
+            writer.writerow(['' if values[i] is None else values[i] for values in columns])
+
+
+def render_table(columns, records, fmt='table', sort=None, reverse=False, top=None,
+                 page_size=None, page=1, out=None):
+    """排序、截取、分页后输出表格"""
+    table = Table(columns, records)
+    if sort:
+        table.sort(sort, reverse)
+    table.top(top)
+    table.page(page_size, page)
+    table.render(out, fmt)
+    return table
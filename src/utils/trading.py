@@ -1,12 +1,62 @@
-from tabulate import tabulate
-from src.utils.formatter import format_number, format_position_info
+import sys
+from src.utils.formatter import format_number, position_record
+from src.utils.price_board import PriceBoard, board_name
+from src.utils.prefetch import Prefetcher
+from src.utils.candles import CandleEngine, INDICATOR_COLUMNS
+from src.utils.table import Column, render_table
+
+# 后台预取的刷新周期 (秒)
+ACCOUNT_TTL = 15
+PRICES_TTL = 5
+EXCHANGE_INFO_TTL = 3600
+# 下单路径 (限价计算、价格偏差检查) 允许的标记价格最大时效 (秒)，预取缓存只用于显示
+ORDER_PRICE_MAX_AGE = 1.0
+
+# 持仓表格列，字段对应 position_record
+POSITION_COLUMNS = [
+    Column('symbol', "交易对"),
+    Column('side', "方向"),
+    Column('quantity', "数量", 4),
+    Column('entry_price', "开仓价", 4),
+    Column('mark_price', "标记价", 4),
+    Column('leverage', "杠杆", 1, 'x'),
+    Column('unrealized_profit', "未实现盈亏", 2),
+    Column('roi', "收益率", 2, '%')
+]
+
+# NDJSON / CSV 输出的持仓字段：方向用 ASCII 的 LONG / SHORT，并带有符号的持仓数量
+POSITION_EXPORT_COLUMNS = [
+    Column('symbol', "交易对"),
+    Column('position_side', "方向"),
+    Column('position_amt', "持仓数量", 4),
+    Column('quantity', "数量", 4),
+    Column('entry_price', "开仓价", 4),
+    Column('mark_price', "标记价", 4),
+    Column('leverage', "杠杆", 1, 'x'),
+    Column('unrealized_profit', "未实现盈亏", 2),
+    Column('roi', "收益率", 2, '%')
+]
 
 class TradingUtils:
-    def __init__(self, client):
+    def __init__(self, client, prefetch=False):
+        """
+        :param prefetch: 是否在后台预取账户信息和标记价格 (交互式菜单使用)
+        """
         self.client = client
         self.exchange_info = None
         self._load_exchange_info()
         
+        # 本机运行了行情进程时直接读取共享内存价格板
+        self.price_board = PriceBoard.attach(board_name(getattr(client, 'testnet', False)))
+        
+        self.prefetcher = None
+        if prefetch:
+            self.prefetcher = Prefetcher()
+            self.prefetcher.register('account', self.client.get_futures_account, ACCOUNT_TTL)
+            self.prefetcher.register('prices', self._load_all_mark_prices, PRICES_TTL)
+            self.prefetcher.register('exchange_info', self._refresh_exchange_info, EXCHANGE_INFO_TTL)
+            self.prefetcher.start()
+        
         # 常用交易对列表
         self.common_symbols = [
             'BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'XRPUSDT', 'DOGEUSDT',
@@ -21,6 +71,48 @@ class TradingUtils:
             print(f"获取交易规则失败: {str(e)}")
             self.exchange_info = {'symbols': []}
     
+    def _load_all_mark_prices(self):
+        return {p['symbol']: float(p['markPrice']) for p in self.client.get_all_mark_prices()}
+    
+    def _refresh_exchange_info(self):
+        # 首次预取时交易规则已在初始化时加载，之后按周期刷新
+        # 刷新失败时抛出异常并保留上一次的交易规则，避免订单校验因规则为空而被跳过
+        if self.prefetcher.peek('exchange_info') is not None:
+            exchange_info = self.client.get_exchange_info()
+            if exchange_info.get('symbols'):
+                self.exchange_info = exchange_info
+        return self.exchange_info
+    
+    def get_account(self):
+        """获取账户信息，开启预取时使用后台缓存"""
+        if self.prefetcher is not None:
+            return self.prefetcher.get('account')
+        return self.client.get_futures_account()
+    
+    def invalidate_account(self):
+        """下单或修改杠杆后使账户缓存失效"""
+        if self.prefetcher is not None:
+            self.prefetcher.invalidate('account')
+    
+    def get_mark_price(self, symbol, max_age=None):
+        """
+        获取标记价格，优先读取共享内存价格板和预取缓存，不可用时请求接口
+        :param max_age: 允许的最大价格时效 (秒)；指定时跳过预取缓存，价格板超时则请求接口。
+                        下单路径使用 ORDER_PRICE_MAX_AGE
+        """
+        if self.price_board is not None:
+            if max_age is None:
+                price = self.price_board.get_mark_price(symbol)
+            else:
+                price = self.price_board.get_mark_price(symbol, max_age=max_age)
+            if price is not None:
+                return price
+        if self.prefetcher is not None and max_age is None:
+            price = self.prefetcher.get('prices').get(symbol)
+            if price is not None:
+                return price
+        return float(self.client.get_mark_price(symbol)['markPrice'])
+    
     def get_symbol_filters(self, symbol):
         """获取交易对的规则过滤器"""
         if not self.exchange_info:
@@ -51,10 +143,12 @@ class TradingUtils:
         available_symbols.extend(sorted(all_symbols))
         return available_symbols
     
-    def get_symbol_info(self, symbol):
-        """获取币对的详细信息"""
-        mark_price_info = self.client.get_mark_price(symbol)
-        mark_price = float(mark_price_info['markPrice'])
+    def get_symbol_info(self, symbol, max_age=None):
+        """
+        获取币对的详细信息
+        :param max_age: 标记价格的最大时效 (秒)，见 get_mark_price
+        """
+        mark_price = self.get_mark_price(symbol, max_age)
         
         filters = self.get_symbol_filters(symbol)
         if not filters:
@@ -100,6 +194,8 @@ class TradingUtils:
         step_size = float(lot_size.get('stepSize', 0))
         
         # 确保数量在最小和最大范围内
+        if quantity > max_qty:
+            print(f"警告: 数量 {quantity} 超过单笔最大下单量 {max_qty}，已截断；大额订单请使用 python main.py exec 拆单执行")
         quantity = max(min_qty, min(max_qty, quantity))
         
         # 根据步长调整数量
@@ -110,6 +206,23 @@ class TradingUtils:
         precision = len(str(step_size).rstrip('0').split('.')[-1]) if '.' in str(step_size) else 0
         return round(quantity, precision)
     
+    def get_lot_rules(self, symbol, order_type='LIMIT'):
+        """
+        获取下单数量规则
+        :param order_type: 市价单使用 MARKET_LOT_SIZE，限价单使用 LOT_SIZE
+        :return: {'min_qty', 'max_qty', 'step_size', 'min_notional'}
+        """
+        filters = self.get_symbol_filters(symbol) or {}
+        lot_size = filters.get('LOT_SIZE', {})
+        if order_type == 'MARKET' and 'MARKET_LOT_SIZE' in filters:
+            lot_size = filters['MARKET_LOT_SIZE']
+        return {
+            'min_qty': float(lot_size.get('minQty', 0)),
+            'max_qty': float(lot_size.get('maxQty', float('inf'))),
+            'step_size': float(lot_size.get('stepSize', 0)),
+            'min_notional': float(filters.get('MIN_NOTIONAL', {}).get('notional', 0))
+        }
+    
     def check_price_filter(self, symbol, price):
         """检查价格是否符合规则"""
         filters = self.get_symbol_filters(symbol)
@@ -141,7 +254,9 @@ class TradingUtils:
         min_notional = filters.get('MIN_NOTIONAL', {})
         min_value = float(min_notional.get('notional', 5.0))  # 默认5 USDT
         
-        order_value = quantity * price if price else quantity * float(self.client.get_mark_price(symbol)['markPrice'])
+        # 下单前校验使用最新的标记价格，不使用显示用的预取缓存
+        mark_price = self.get_mark_price(symbol, ORDER_PRICE_MAX_AGE)
+        order_value = quantity * (price or mark_price)
         if order_value < min_value:
             raise ValueError(f"订单价值必须大于 {min_value} USDT")
             
@@ -151,9 +266,6 @@ class TradingUtils:
             multiplier_up = float(percent_filter.get('multiplierUp', 1.1))
             multiplier_down = float(percent_filter.get('multiplierDown', 0.9))
             
-            # 获取最新价格
-            mark_price = float(self.client.get_mark_price(symbol)['markPrice'])
-            
             # 计算允许的价格范围
             max_price = mark_price * multiplier_up
             min_price = mark_price * multiplier_down
@@ -165,16 +277,30 @@ class TradingUtils:
         # 调整数量精度
         return self.calculate_quantity(symbol, quantity, price)
     
-    def display_account_info(self, is_testnet=False):
-        """显示账户信息"""
+    def display_account_info(self, is_testnet=False, fmt='table', sort=None, reverse=False,
+                             top=None, page_size=None, page=1):
+        """
+        显示账户信息
+        :param fmt: "table" 显示账户总览和持仓表格; "ndjson" / "csv" 只输出持仓数据，便于管道处理
+        :param sort: 持仓排序字段 (POSITION_COLUMNS / POSITION_EXPORT_COLUMNS 中的 key)
+        :param reverse: 是否降序
+        :param top: 只显示前 N 个持仓
+        :param page_size: 每页行数
+        :param page: 页码 (从 1 开始)
+        """
         try:
             # 获取账户信息
-            futures_account = self.client.get_futures_account()
+            futures_account = self.get_account()
             positions = futures_account['positions']
             
             # 过滤出有持仓的合约
             active_positions = [p for p in positions if float(p['positionAmt']) != 0]
             
+            records = [position_record(p, self.get_mark_price(p['symbol'])) for p in active_positions]
+            if fmt != 'table':
+                render_table(POSITION_EXPORT_COLUMNS, records, fmt, sort, reverse, top, page_size, page)
+                return
+            
             # 打印账户总览
             total_wallet_balance = float(futures_account['totalWalletBalance'])
             total_unrealized_profit = float(futures_account['totalUnrealizedProfit'])
@@ -187,28 +313,43 @@ class TradingUtils:
             print(f"总资产: {format_number(total_wallet_balance + total_unrealized_profit)} USDT")
             
             # 打印持仓信息
-            if active_positions:
+            if records:
                 print("\n=== 当前持仓 ===")
-                position_data = []
-                for position in active_positions:
-                    # 获取当前市价
-                    mark_price_info = self.client.get_mark_price(position['symbol'])
-                    mark_price = float(mark_price_info['markPrice'])
-                    
-                    # 格式化持仓信息
-                    position_data.append(format_position_info(position, mark_price))
-                
-                headers = ["交易对", "方向", "数量", "开仓价", "标记价", "杠杆", "未实现盈亏", "收益率"]
-                print(tabulate(position_data, headers=headers, tablefmt="grid", disable_numparse=True))
+                render_table(POSITION_COLUMNS, records, fmt, sort, reverse, top, page_size, page)
             else:
                 print("\n当前没有持仓")
                 
         except Exception as e:
-            print(f"获取账户信息失败: {str(e)}")
+            # ndjson / csv 输出时错误信息写到 stderr，避免混入管道数据
+            log = sys.stdout if fmt == 'table' else sys.stderr
+            print(f"获取账户信息失败: {str(e)}", file=log)
             if hasattr(e, '__traceback__'):
                 import traceback
-                print("\n详细错误信息:")
-                traceback.print_tb(e.__traceback__)
+                print("\n详细错误信息:", file=log)
+                traceback.print_tb(e.__traceback__, file=log)
+
+    def display_indicators(self, interval='15m', symbols=None, fmt='table'):
+        """
+        显示K线指标 (EMA / ATR / VWAP / 波动率)
+        :param symbols: 交易对列表，默认使用当前持仓的交易对
+        :param fmt: 输出格式 ("table" / "ndjson" / "csv")
+        """
+        if symbols is None:
+            positions = self.get_account()['positions']
+            symbols = [p['symbol'] for p in positions if float(p['positionAmt']) != 0]
+        if not symbols:
+            return
+        try:
+            engine = CandleEngine()
+            failed = engine.seed(self.client, symbols, interval)
+            if fmt == 'table':
+                print(f"\n=== K线指标 ({interval}) ===")
+            render_table(INDICATOR_COLUMNS, engine.snapshots(interval), fmt)
+            log = sys.stdout if fmt == 'table' else sys.stderr
+            for symbol, error in failed.items():
+                print(f"获取 {symbol} K线失败，已跳过: {error}", file=log)
+        except Exception as e:
+            print(f"获取K线指标失败: {str(e)}", file=sys.stdout if fmt == 'table' else sys.stderr)
 
     def format_price(self, symbol, price):
         """格式化价格，确保符合精度要求"""
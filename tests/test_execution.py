@@ -0,0 +1,31 @@
+import asyncio
+from src.utils.execution import TimerWheel
+
+
+def run_wheel(wheel, delays, monkeypatch):
+    """用不等待的 sleep 推进时间轮，返回每个定时任务到期时已推进的刻度数"""
+    ticks = [0]
+    fired = {}
+
+    async def fake_sleep(_):
+        ticks[0] += 1
+
+    monkeypatch.setattr(asyncio, 'sleep', fake_sleep)
+    for delay in delays:
+        wheel.schedule(delay, lambda d: fired.setdefault(d, ticks[0]), delay)
+    asyncio.run(wheel.run())
+    return fired
+
+
+def test_timer_fires_on_exact_tick(monkeypatch):
+    wheel = TimerWheel(tick=0.001, slots=8)
+    delays = [0.001, 0.007, 0.008, 0.009, 0.016, 0.017, 0.024]
+    fired = run_wheel(wheel, delays, monkeypatch)
+    assert fired == {d: round(d / 0.001) for d in delays}
+
+
+def test_timer_order_across_rotation(monkeypatch):
+    wheel = TimerWheel(tick=0.001, slots=8)
+    fired = run_wheel(wheel, [0.009, 0.008], monkeypatch)
+    assert fired[0.008] < fired[0.009]
+    assert wheel.pending == 0